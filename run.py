@@ -1,43 +1,784 @@
+import argparse
+import asyncio
+import heapq
 import json
-from datetime import datetime
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import lru_cache
+from itertools import repeat
+from typing import Iterable, Iterator, NamedTuple, TextIO
 
+# Различных дат во входных данных обычно немного, поэтому кэш небольшой
+DATE_CACHE_SIZE = 4096
+# Размер куска файла для параллельного разбора: ограничивает память процесса-воркера
+CHUNK_BYTES = 32 * 1024 * 1024
 
-def parse_date(date_str: str) -> datetime.date:
+# Бинарный формат гостей: заголовок (сигнатура, версия, вместимость, число гостей),
+# затем столбец дат заезда и столбец дат выезда — порядковые номера дней, int32 little-endian
+BINARY_MAGIC = b"TCKG"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sHxxiI")
+
+# Сервер проверки вместимости: адрес по умолчанию и предельная длина строки запроса
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_LINE_LIMIT = 64 * 1024 * 1024
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date_ordinal(date_str: str) -> int:
+    """
+    Быстро парсит строку в формате YYYY-MM-DD в порядковый номер дня (date.toordinal()).
+    Результаты кэшируются, некорректные даты приводят к ValueError.
+    """
+    if (len(date_str) != 10 or date_str[4] != "-" or date_str[7] != "-"
+            or not date_str.isascii()
+            or not (date_str[:4] + date_str[5:7] + date_str[8:]).isdigit()):
+        raise ValueError(
+            f"Некорректная дата {date_str!r}: ожидается формат YYYY-MM-DD")
+    try:
+        return date(int(date_str[:4]), int(date_str[5:7]),
+                    int(date_str[8:])).toordinal()
+    except ValueError as error:
+        raise ValueError(
+            f"Некорректная дата {date_str!r}: {error}") from error
+
+
+def parse_date(date_str: str) -> date:
     """
     Парсит строку в формате YYYY-MM-DD в объект datetime.date.
     """
-    return datetime.strptime(date_str, "%Y-%m-%d").date()
+    return date.fromordinal(parse_date_ordinal(date_str))
 
 
-def check_capacity(max_capacity: int, guests: list) -> bool:
+def read_guests(stream: TextIO, n: int) -> Iterator[dict[str, str]]:
     """
-    Проверяет, не превышает ли число одновременно проживающих гостей заданную вместимость.
+    Лениво читает из потока n строк с JSON-описаниями гостей.
     """
-    events = []
+    for _ in range(n):
+        yield json.loads(stream.readline())
+
+
+def accumulate_day_deltas(
+        guests: Iterable[dict[str, str]],
+        day_deltas: dict[int, int] | None = None
+) -> dict[int, int]:
+    """
+    Накапливает разностный массив по дням: +1 в день заезда, -1 в день выезда.
+    Ключи — порядковые номера дат, память O(числа дней).
+    """
+    if day_deltas is None:
+        day_deltas = defaultdict(int)
     for guest in guests:
-        check_in = parse_date(guest["check-in"])
-        check_out = parse_date(guest["check-out"])
-        events.append((check_in, 1))
-        events.append((check_out, -1))
-    events.sort()
+        day_deltas[parse_date_ordinal(guest["check-in"])] += 1
+        day_deltas[parse_date_ordinal(guest["check-out"])] -= 1
+    return day_deltas
+
+
+def day_occupancy(day_deltas: dict[int, int]) -> tuple[int, list[int]]:
+    """
+    Разворачивает непустой разностный массив в заселённость каждого дня подряд.
+    Возвращает порядковый номер первого дня и список заселённости.
+    """
+    first_day = min(day_deltas)
+    current = 0
+    occupancy = []
+    for day in range(first_day, max(day_deltas) + 1):
+        current += day_deltas.get(day, 0)
+        occupancy.append(current)
+    return first_day, occupancy
+
 
+def sweep_day_deltas(max_capacity: int, day_deltas: dict[int, int]) -> bool:
+    """
+    Проходит разностный массив по дням подряд, без сортировки событий, за O(числа дней).
+    Заселённость дня — сумма изменений за все дни до него включительно.
+    """
+    if not day_deltas:
+        return True
     current = 0
-    for date, delta in events:
-        current += delta
+    for day in range(min(day_deltas), max(day_deltas) + 1):
+        current += day_deltas.get(day, 0)
         if current > max_capacity:
             return False
     return True
 
 
-if __name__ == "__main__":
-    max_capacity = int(input())
-    n = int(input())
+class OccupancyProfile(NamedTuple):
+    """
+    Результат одного прохода по дням: пиковая заселённость, дни пика и сжатая
+    временная шкала — пары (дата, заселённость начиная с этой даты) в моменты изменений.
+    """
+    peak: int
+    peak_dates: list[date]
+    timeline: list[tuple[date, int]]
+
+    def fits(self, max_capacity: int) -> bool:
+        """
+        Отвечает за O(1), помещаются ли гости в отель вместимостью max_capacity.
+        """
+        return not self.timeline or self.peak <= max_capacity
+
+
+class BinaryGuests(NamedTuple):
+    """
+    Гости из бинарного файла: вместимость и столбцы порядковых номеров дат.
+    """
+    max_capacity: int
+    check_ins: memoryview
+    check_outs: memoryview
+
+
+class OccupancyIndex:
+    """
+    Индекс заселённости по дням: дерево отрезков с ленивым прибавлением на отрезке
+    и максимумом на отрезке. Хранит число гостей на каждый день из диапазона
+    [first_day, first_day + size) порядковых номеров дат; гость занимает дни
+    [check-in, check-out). Добавление, удаление и запросы — O(log дней).
+    """
+
+    def __init__(self) -> None:
+        self._first_day = 0
+        self._size = 0
+        self._tree: list[int] = []
+        self._added: list[int] = []
+        self._bookings: Counter[tuple[int, int]] = Counter()
+        self._guest_count = 0
+
+    @classmethod
+    def from_guests(cls,
+                    guests: Iterable[dict[str, str]]) -> "OccupancyIndex":
+        """
+        Строит индекс сразу по всем гостям за O(n + дней) через разностный массив.
+        """
+        bookings: Counter[tuple[int, int]] = Counter()
+        day_deltas: dict[int, int] = defaultdict(int)
+        for guest in guests:
+            check_in = parse_date_ordinal(guest["check-in"])
+            check_out = parse_date_ordinal(guest["check-out"])
+            bookings[(check_in, check_out)] += 1
+            day_deltas[check_in] += 1
+            day_deltas[check_out] -= 1
+        index = (cls.from_occupancy(*day_occupancy(day_deltas)) if day_deltas
+                 else cls())
+        index._bookings = bookings
+        index._guest_count = bookings.total()
+        return index
+
+    @classmethod
+    def from_occupancy(cls, first_day: int,
+                       occupancy: list[int]) -> "OccupancyIndex":
+        """
+        Строит индекс по готовой заселённости дней начиная с first_day (см. day_occupancy).
+        Бронирования в нём не хранятся, поэтому remove_guest для них недоступен.
+        """
+        index = cls()
+        if occupancy:
+            index._rebuild(first_day, occupancy)
+        return index
+
+    def __len__(self) -> int:
+        return self._guest_count
+
+    def add_guest(self, guest: dict[str, str]) -> None:
+        """
+        Добавляет бронирование гостя.
+        """
+        check_in = parse_date_ordinal(guest["check-in"])
+        check_out = parse_date_ordinal(guest["check-out"])
+        self._bookings[(check_in, check_out)] += 1
+        self._guest_count += 1
+        self._apply(check_in, check_out, 1)
+
+    def remove_guest(self, guest: dict[str, str]) -> None:
+        """
+        Отменяет ранее добавленное бронирование гостя.
+        Бросает KeyError, если такого бронирования нет.
+        """
+        booking = (parse_date_ordinal(guest["check-in"]),
+                   parse_date_ordinal(guest["check-out"]))
+        if self._bookings[booking] <= 0:
+            raise KeyError(f"Бронирование не найдено: {guest!r}")
+        self._bookings[booking] -= 1
+        self._guest_count -= 1
+        if not self._bookings[booking]:
+            del self._bookings[booking]
+        self._apply(*booking, -1)
+
+    def remove_guests(self, guests: Iterable[dict[str, str]]) -> None:
+        """
+        Отменяет несколько бронирований сразу: если хотя бы одного нет
+        (с учётом повторов в guests), бросает KeyError и ничего не меняет.
+        """
+        guests = list(guests)
+        requested: Counter[tuple[int, int]] = Counter()
+        for guest in guests:
+            booking = (parse_date_ordinal(guest["check-in"]),
+                       parse_date_ordinal(guest["check-out"]))
+            requested[booking] += 1
+            if requested[booking] > self._bookings[booking]:
+                raise KeyError(f"Бронирование не найдено: {guest!r}")
+        for guest in guests:
+            self.remove_guest(guest)
+
+    def peak(self, check_in: str | None = None,
+             check_out: str | None = None) -> int:
+        """
+        Возвращает максимальное число гостей за дни [check_in, check_out).
+        Без аргументов — максимум за всё время.
+        """
+        if not self._size:
+            return 0
+        first_day = self._first_day
+        last_day = first_day + self._size - 1
+        left = first_day if check_in is None else parse_date_ordinal(check_in)
+        right = last_day if check_out is None else parse_date_ordinal(
+            check_out) - 1
+        if left > right:
+            return 0
+        # Дни вне индекса никем не заняты
+        outside = 0 if left < first_day or right > last_day else None
+        left, right = max(left, first_day), min(right, last_day)
+        if left > right:
+            return 0
+        inside = self._max(1, 0, self._size - 1, left - first_day,
+                           right - first_day)
+        return inside if outside is None else max(inside, outside)
+
+    def fits(self, guest: dict[str, str], max_capacity: int) -> bool:
+        """
+        Проверяет, что после заселения гостя вместимость не будет превышена в дни его проживания.
+        """
+        check_in = parse_date_ordinal(guest["check-in"])
+        check_out = parse_date_ordinal(guest["check-out"])
+        if check_in >= check_out:
+            return True
+        return self.peak(guest["check-in"], guest["check-out"]) + 1 <= max_capacity
+
+    def _apply(self, check_in: int, check_out: int, delta: int) -> None:
+        """
+        Прибавляет delta к дням [check_in, check_out), при обратном порядке дат — -delta
+        к дням [check_out, check_in), как и учёт событий в check_capacity.
+        """
+        if check_in > check_out:
+            check_in, check_out, delta = check_out, check_in, -delta
+        self._ensure_covers(check_in, check_out)
+        if check_in < check_out:
+            self._add(1, 0, self._size - 1, check_in - self._first_day,
+                      check_out - 1 - self._first_day, delta)
+
+    def _ensure_covers(self, first_day: int, last_day: int) -> None:
+        """
+        Расширяет диапазон дней индекса так, чтобы он содержал [first_day, last_day].
+        """
+        if not self._size:
+            self._rebuild(first_day, [0] * (last_day - first_day + 1))
+            return
+        old_first = self._first_day
+        old_last = old_first + self._size - 1
+        if old_first <= first_day and last_day <= old_last:
+            return
+        new_first = min(first_day, old_first)
+        new_last = max(last_day, old_last)
+        # Запас вдвое, чтобы расширения амортизировались; при расширении
+        # влево запас тоже слева, иначе каждая более ранняя дата удваивает дерево
+        days = max(new_last - new_first + 1, 2 * self._size)
+        if first_day < old_first:
+            new_first = min(first_day, new_last - days + 1)
+        occupancy = [0] * days
+        offset = old_first - new_first
+        for day, value in enumerate(self._leaf_values()):
+            occupancy[offset + day] = value
+        self._rebuild(new_first, occupancy)
+
+    def _leaf_values(self) -> list[int]:
+        """
+        Возвращает заселённость каждого дня индекса, накапливая отложенные прибавления.
+        """
+        values = [0] * self._size
+        stack = [(1, 0, self._size - 1, 0)]
+        while stack:
+            node, lo, hi, carried = stack.pop()
+            carried += self._added[node]
+            if lo == hi:
+                values[lo] = carried
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node, lo, mid, carried))
+            stack.append((2 * node + 1, mid + 1, hi, carried))
+        return values
+
+    def _rebuild(self, first_day: int, occupancy: list[int]) -> None:
+        """
+        Перестраивает дерево по готовой заселённости дней начиная с first_day.
+        """
+        size = 1
+        while size < len(occupancy):
+            size *= 2
+        tree = [0] * (2 * size)
+        tree[size:size + len(occupancy)] = occupancy
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._first_day = first_day
+        self._size = size
+        self._tree = tree
+        self._added = [0] * size + tree[size:]
+
+    def _add(self, node: int, lo: int, hi: int, left: int, right: int,
+             delta: int) -> None:
+        if right < lo or hi < left:
+            return
+        if left <= lo and hi <= right:
+            self._tree[node] += delta
+            self._added[node] += delta
+            return
+        mid = (lo + hi) // 2
+        self._add(2 * node, lo, mid, left, right, delta)
+        self._add(2 * node + 1, mid + 1, hi, left, right, delta)
+        self._tree[node] = (max(self._tree[2 * node], self._tree[2 * node + 1])
+                            + self._added[node])
+
+    def _max(self, node: int, lo: int, hi: int, left: int, right: int) -> int:
+        if left <= lo and hi <= right:
+            return self._tree[node]
+        mid = (lo + hi) // 2
+        if right <= mid:
+            best = self._max(2 * node, lo, mid, left, right)
+        elif left > mid:
+            best = self._max(2 * node + 1, mid + 1, hi, left, right)
+        else:
+            best = max(self._max(2 * node, lo, mid, left, right),
+                       self._max(2 * node + 1, mid + 1, hi, left, right))
+        return best + self._added[node]
+
+
+class OccupancyRangeTable:
+    """
+    Заселённость по дням с разреженной таблицей максимумов: построение за
+    O(дней · log дней), максимум на любом окне дат — за O(1).
+    """
+
+    def __init__(self, first_day: int, occupancy: list[int]) -> None:
+        self._first_day = first_day
+        levels = [occupancy]
+        half = 1
+        while 2 * half <= len(occupancy):
+            previous = levels[-1]
+            levels.append(list(map(max, previous[:-half], previous[half:])))
+            half *= 2
+        self._levels = levels
+
+    @classmethod
+    def from_guests(cls, guests: Iterable[dict[str, str]]
+                    ) -> "OccupancyRangeTable":
+        """
+        Строит таблицу по гостям одним проходом разностного массива.
+        """
+        day_deltas = accumulate_day_deltas(guests)
+        if not day_deltas:
+            return cls(0, [])
+        return cls(*day_occupancy(day_deltas))
+
+    def max_occupancy(self, check_in: str, check_out: str) -> int:
+        """
+        Возвращает максимальное число гостей за дни [check_in, check_out).
+        Дни вне диапазона бронирований считаются пустыми.
+        """
+        left = parse_date_ordinal(check_in) - self._first_day
+        right = parse_date_ordinal(check_out) - self._first_day
+        days = len(self._levels[0])
+        if left >= right:
+            return 0
+        outside = left < 0 or right > days
+        left, right = max(left, 0), min(right, days)
+        if left >= right:
+            return 0
+        level = (right - left).bit_length() - 1
+        row = self._levels[level]
+        best = max(row[left], row[right - (1 << level)])
+        return max(best, 0) if outside else best
+
+    def fits(self, check_in: str, check_out: str, max_capacity: int) -> bool:
+        """
+        Проверяет, что в окне [check_in, check_out) гостей не больше max_capacity.
+        """
+        return self.max_occupancy(check_in, check_out) <= max_capacity
+
+
+def answer_range_queries(table: OccupancyRangeTable, max_capacity: int,
+                         queries: Iterable[str]) -> Iterator[bool]:
+    """
+    Отвечает на запросы вида "<check-in> <check-out> [max_capacity]" по одной строке.
+    Если вместимость в запросе не указана, используется max_capacity.
+    """
+    for query in queries:
+        check_in, check_out, *capacity = query.split()
+        limit = int(capacity[0]) if capacity else max_capacity
+        yield table.fits(check_in, check_out, limit)
+
+
+def check_capacity(max_capacity: int, guests: list) -> bool:
+    """
+    Проверяет, не превышает ли число одновременно проживающих гостей заданную вместимость.
+    """
+    index = OccupancyIndex.from_guests(guests)
+    return not index or index.peak() <= max_capacity
 
-    guests = []
-    for _ in range(n):
-        guest_json = input()
-        guest_data = json.loads(guest_json)
-        guests.append(guest_data)
 
-    result = check_capacity(max_capacity, guests)
+def occupancy_profile(guests: Iterable[dict[str, str]]) -> OccupancyProfile:
+    """
+    Один раз проходит по дням и строит OccupancyProfile, после чего любые пороги
+    вместимости проверяются без повторного разбора гостей. Минимальная подходящая
+    вместимость равна peak.
+    """
+    day_deltas = accumulate_day_deltas(guests)
+    if not day_deltas:
+        return OccupancyProfile(0, [], [])
+    current = 0
+    peak = None
+    peak_days: list[int] = []
+    timeline: list[tuple[date, int]] = []
+    for day in range(min(day_deltas), max(day_deltas) + 1):
+        delta = day_deltas.get(day, 0)
+        if delta or not timeline:
+            current += delta
+            timeline.append((date.fromordinal(day), current))
+        if peak is None or current > peak:
+            peak = current
+            peak_days = [day]
+        elif current == peak:
+            peak_days.append(day)
+    return OccupancyProfile(peak, [date.fromordinal(day) for day in peak_days],
+                            timeline)
+
+
+def check_capacity_stream(max_capacity: int,
+                          guests: Iterable[dict[str, str]]) -> bool:
+    """
+    Потоковый вариант check_capacity: гости обрабатываются по одному и не хранятся.
+    Возвращает тот же ответ, что и check_capacity.
+    """
+    return sweep_day_deltas(max_capacity, accumulate_day_deltas(guests))
+
+
+def check_capacity_sorted(max_capacity: int,
+                          guests: Iterable[dict[str, str]]) -> bool:
+    """
+    Вариант check_capacity для потока гостей, упорядоченного по дате заезда.
+    Держит кучу дат выезда проживающих гостей и прекращает чтение, как только
+    их становится больше max_capacity. Если порядок нарушен, дочитывает поток
+    в разностный массив и проверяет его как check_capacity_stream.
+    Выезд раньше заезда тоже переводит проверку в check_capacity_stream, но если
+    такой гость идёт уже после превышения, ответ может расходиться с check_capacity.
+    """
+    guests = iter(guests)
+    if max_capacity < 0:
+        return check_capacity_stream(max_capacity, guests)
+    day_deltas: dict[int, int] = defaultdict(int)
+    active_check_outs: list[int] = []
+    previous_check_in = None
+    for guest in guests:
+        check_in = parse_date_ordinal(guest["check-in"])
+        check_out = parse_date_ordinal(guest["check-out"])
+        day_deltas[check_in] += 1
+        day_deltas[check_out] -= 1
+        if ((previous_check_in is not None and check_in < previous_check_in)
+                or check_out < check_in):
+            accumulate_day_deltas(guests, day_deltas)
+            return sweep_day_deltas(max_capacity, day_deltas)
+        previous_check_in = check_in
+        if check_in == check_out:
+            continue
+
+        while active_check_outs and active_check_outs[0] <= check_in:
+            heapq.heappop(active_check_outs)
+        heapq.heappush(active_check_outs, check_out)
+        if len(active_check_outs) > max_capacity:
+            return False
+    return True
+
+
+def check_capacity_ordinals(max_capacity: int, check_ins: Iterable[int],
+                            check_outs: Iterable[int]) -> bool:
+    """
+    Вариант check_capacity по готовым столбцам порядковых номеров дат заезда и выезда.
+    """
+    day_deltas = Counter(check_ins)
+    day_deltas.subtract(Counter(check_outs))
+    return sweep_day_deltas(max_capacity, day_deltas)
+
+
+def convert_to_binary(stream: TextIO, path: str) -> int:
+    """
+    Переводит входные данные run.py из потока в бинарный столбцовый файл.
+    Имена гостей отбрасываются. Возвращает число записанных гостей.
+    """
+    max_capacity = int(stream.readline())
+    n = int(stream.readline())
+    check_ins, check_outs = array("i"), array("i")
+    for guest in read_guests(stream, n):
+        check_ins.append(parse_date_ordinal(guest["check-in"]))
+        check_outs.append(parse_date_ordinal(guest["check-out"]))
+    if sys.byteorder != "little":
+        check_ins.byteswap()
+        check_outs.byteswap()
+    with open(path, "wb") as file:
+        file.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION,
+                                      max_capacity, n))
+        check_ins.tofile(file)
+        check_outs.tofile(file)
+    return n
+
+
+def load_binary_guests(path: str) -> BinaryGuests:
+    """
+    Отображает бинарный файл гостей в память и возвращает столбцы дат без копирования.
+    """
+    with open(path, "rb") as file:
+        header = file.read(BINARY_HEADER.size)
+        if len(header) != BINARY_HEADER.size:
+            raise ValueError(f"Файл {path} слишком короткий")
+        magic, version, max_capacity, n = BINARY_HEADER.unpack(header)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError(
+                f"Файл {path} не является файлом гостей версии {BINARY_VERSION}")
+        end = BINARY_HEADER.size + 8 * n
+        if file.seek(0, os.SEEK_END) != end:
+            raise ValueError(f"Размер файла {path} не совпадает с заголовком")
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    data = memoryview(buffer)[BINARY_HEADER.size:end]
+    if sys.byteorder != "little":
+        swapped = array("i")
+        swapped.frombytes(data)
+        swapped.byteswap()
+        columns = memoryview(swapped)
+    else:
+        columns = data.cast("i")
+    return BinaryGuests(max_capacity, columns[:n], columns[n:])
+
+
+def split_into_chunks(path: str, start: int, chunks: int
+                      ) -> list[tuple[int, int]]:
+    """
+    Делит байты файла начиная со start на диапазоны [begin, end), границы которых
+    совпадают с началами строк.
+    """
+    with open(path, "rb") as file:
+        size = file.seek(0, os.SEEK_END)
+        step = max(1, (size - start) // max(1, chunks))
+        bounds = [start]
+        while bounds[-1] < size:
+            file.seek(min(size, bounds[-1] + step))
+            file.readline()
+            bounds.append(min(size, file.tell()))
+    return list(zip(bounds, bounds[1:]))
+
+
+def ingest_chunk(path: str, begin: int, end: int) -> tuple[int, dict[int, int]]:
+    """
+    Разбирает строки гостей из байтового диапазона файла в отдельный разностный массив.
+    Возвращает число гостей в диапазоне и массив.
+    """
+    with open(path, "rb") as file:
+        file.seek(begin)
+        lines = file.read(end - begin).splitlines()
+    guests = [json.loads(line) for line in lines if line.strip()]
+    return len(guests), dict(accumulate_day_deltas(guests))
+
+
+def check_capacity_parallel(path: str, workers: int | None = None) -> bool:
+    """
+    Проверяет вместимость по файлу во входном формате run.py, разбирая гостей
+    параллельно в пуле процессов. Частичные разностные массивы складываются
+    перед общим проходом по дням; ответ совпадает с check_capacity.
+    """
+    with open(path, "rb") as file:
+        max_capacity = int(file.readline())
+        n = int(file.readline())
+        start = file.tell()
+        size = file.seek(0, os.SEEK_END)
+
+    workers = workers or os.cpu_count() or 1
+    chunks = max(workers, -(-(size - start) // CHUNK_BYTES))
+    ranges = split_into_chunks(path, start, chunks)
+
+    day_deltas: dict[int, int] = defaultdict(int)
+    count = 0
+    begins = [begin for begin, _ in ranges]
+    ends = [end for _, end in ranges]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        partials = pool.map(ingest_chunk, repeat(path), begins, ends)
+        for chunk_count, chunk_deltas in partials:
+            count += chunk_count
+            for day, delta in chunk_deltas.items():
+                day_deltas[day] += delta
+    if count != n:
+        raise ValueError(f"Ожидалось гостей: {n}, найдено: {count}")
+    return sweep_day_deltas(max_capacity, day_deltas)
+
+
+def handle_request(hotels: dict[str, OccupancyIndex], request: dict) -> object:
+    """
+    Выполняет один запрос протокола сервера над состоянием отелей и возвращает результат.
+    Операции: add/remove (guests), check (max_capacity), peak (check-in, check-out),
+    fits (guest, max_capacity), drop — удалить отель.
+    """
+    op, name = request["op"], request["hotel"]
+    if op == "add":
+        guests = request["guests"]
+        # Сначала разбираем всех гостей, чтобы ошибочный запрос не менял состояние
+        for guest in guests:
+            parse_date_ordinal(guest["check-in"])
+            parse_date_ordinal(guest["check-out"])
+        index = hotels.setdefault(name, OccupancyIndex())
+        for guest in guests:
+            index.add_guest(guest)
+        return len(index)
+    if op == "drop":
+        return hotels.pop(name, None) is not None
+
+    index = hotels.get(name)
+    if index is None:
+        index = OccupancyIndex()
+    if op == "remove":
+        index.remove_guests(request["guests"])
+        return len(index)
+    if op == "check":
+        return not index or index.peak() <= request["max_capacity"]
+    if op == "peak":
+        return index.peak(request.get("check-in"), request.get("check-out"))
+    if op == "fits":
+        return index.fits(request["guest"], request["max_capacity"])
+    raise ValueError(f"Неизвестная операция: {op!r}")
+
+
+async def handle_client(hotels: dict[str, OccupancyIndex],
+                        reader: asyncio.StreamReader,
+                        writer: asyncio.StreamWriter) -> None:
+    """
+    Обслуживает одного клиента: по строке JSON-запроса отвечает строкой JSON
+    вида {"ok": true, "result": ...} или {"ok": false, "error": ...}.
+    Поле "id" запроса, если оно есть, возвращается в ответе.
+    """
+    try:
+        while line := await reader.readline():
+            request = None
+            try:
+                request = json.loads(line)
+                response = {"ok": True,
+                            "result": handle_request(hotels, request)}
+            except (ValueError, KeyError, TypeError) as error:
+                request = request if isinstance(request, dict) else {}
+                response = {"ok": False, "error": str(error)}
+            if "id" in request:
+                response["id"] = request["id"]
+            writer.write(json.dumps(response, ensure_ascii=False).encode()
+                         + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str = SERVER_HOST, port: int = SERVER_PORT,
+                unix_path: str | None = None) -> None:
+    """
+    Запускает сервер, который держит состояние отелей в памяти между запросами.
+    Слушает TCP host:port или Unix-сокет unix_path.
+    """
+    hotels: dict[str, OccupancyIndex] = {}
+
+    async def on_client(reader: asyncio.StreamReader,
+                        writer: asyncio.StreamWriter) -> None:
+        await handle_client(hotels, reader, writer)
+
+    if unix_path is not None:
+        server = await asyncio.start_unix_server(
+            on_client, unix_path, limit=SERVER_LINE_LIMIT)
+    else:
+        server = await asyncio.start_server(
+            on_client, host, port, limit=SERVER_LINE_LIMIT)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Проверка вместимости отеля по списку гостей из stdin.")
+    parser.add_argument(
+        "--queries", action="store_true",
+        help="после гостей прочитать число запросов и строки "
+             "'<check-in> <check-out> [max_capacity]'")
+    parser.add_argument(
+        "--sorted", action="store_true",
+        help="гости упорядочены по дате заезда: остановиться на первом превышении")
+    parser.add_argument(
+        "--convert", metavar="OUT",
+        help="сохранить гостей из stdin в бинарный файл OUT")
+    parser.add_argument(
+        "--binary", action="store_true",
+        help="читать гостей из бинарного файла PATH")
+    parser.add_argument(
+        "--workers", type=int, metavar="N",
+        help="разбирать файл PATH параллельно в N процессах")
+    parser.add_argument(
+        "--serve", action="store_true",
+        help="запустить сервер проверки вместимости (JSON по строкам)")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--unix", metavar="SOCKET",
+                        help="слушать Unix-сокет вместо TCP")
+    parser.add_argument(
+        "path", nargs="?",
+        help="файл во входном формате (для --workers) или бинарный (для --binary)")
+    args = parser.parse_args()
+
+    if args.serve:
+        asyncio.run(serve(args.host, args.port, args.unix))
+        return
+    if args.convert is not None:
+        convert_to_binary(sys.stdin, args.convert)
+        return
+    if args.binary:
+        if args.path is None:
+            parser.error("--binary требует указать файл PATH")
+        guests = load_binary_guests(args.path)
+        print(check_capacity_ordinals(guests.max_capacity, guests.check_ins,
+                                      guests.check_outs))
+        return
+
+    if args.workers is not None:
+        if args.path is None:
+            parser.error("--workers требует указать файл PATH")
+        print(check_capacity_parallel(args.path, args.workers))
+        return
+
+    max_capacity = int(sys.stdin.readline())
+    n = int(sys.stdin.readline())
+    guests = read_guests(sys.stdin, n)
+
+    if args.queries:
+        table = OccupancyRangeTable.from_guests(guests)
+        q = int(sys.stdin.readline())
+        queries = (sys.stdin.readline() for _ in range(q))
+        for result in answer_range_queries(table, max_capacity, queries):
+            print(result)
+        return
+
+    if args.sorted:
+        result = check_capacity_sorted(max_capacity, guests)
+    else:
+        result = check_capacity_stream(max_capacity, guests)
     print(result)
+
+
+if __name__ == "__main__":
+    main()
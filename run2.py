@@ -1,7 +1,19 @@
+import argparse
+import hashlib
+import json
+import os
+import struct
 import sys
-from collections import deque, defaultdict
+import tempfile
+import time
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import heapq
-from typing import NamedTuple
+from itertools import compress
+from multiprocessing import shared_memory
+from typing import Callable, Iterable, NamedTuple, Sequence
 
 # Использование dataclass/NamedTuple замедляет выполнение кода
 Position = tuple[int, int]
@@ -12,13 +24,289 @@ class ParsedGrid(NamedTuple):
     key_positions: dict[str, Position]
 
 
-class PriorityQueueEntry(NamedTuple):
-    priority: int
-    cost: int
-    state: tuple[int, ...]
+class FlatGrid(NamedTuple):
+    cells: bytes
+    stride: int
+    rows: int
+    cols: int
 
-    def __lt__(self, other: "PriorityQueueEntry") -> bool:
-        return self.priority < other.priority
+
+class JunctionGraph(NamedTuple):
+    node_of_cell: dict[int, int]
+    node_bits: list[int]
+    edges: list[list[tuple[int, int]]]
+
+
+class PruneReport(NamedTuple):
+    grid: FlatGrid
+    removed_cells: int
+    dropped_doors: int
+
+
+class CachedGraph(NamedTuple):
+    graph: list[dict[int, list[tuple[int, int]]]]
+    num_keys: int
+    answer: int | None
+
+
+class BucketQueue:
+    """
+    Очередь с приоритетами для целых неотрицательных приоритетов (очередь Дайала):
+    корзина на каждое значение приоритета, push и pop — O(1) амортизированно.
+    Элементы — кортежи, первым полем которых идёт приоритет.
+    """
+    __slots__ = ("_buckets", "_current", "_size")
+
+    def __init__(self) -> None:
+        self._buckets: list[list[tuple[int, ...]]] = []
+        self._current = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, entry: tuple[int, ...]) -> None:
+        priority = entry[0]
+        buckets = self._buckets
+        if priority >= len(buckets):
+            buckets.extend([] for _ in range(priority + 1 - len(buckets)))
+        if priority < self._current:
+            self._current = priority
+        buckets[priority].append(entry)
+        self._size += 1
+
+    def pop(self) -> tuple[int, ...]:
+        buckets = self._buckets
+        current = self._current
+        while not buckets[current]:
+            current += 1
+        self._current = current
+        self._size -= 1
+        return buckets[current].pop()
+
+
+class Subproblem(NamedTuple):
+    robots: list[int]
+    keys: list[int]
+
+
+class TransitionTable(NamedTuple):
+    variants: list[tuple[tuple[int, int], ...]]
+    reachable_keys: list[int]
+
+
+class ParetoFrontier:
+    """
+    Множество недоминируемых пар (маска дверей, расстояние). Пара доминирует над
+    другой, если её маска — подмножество, а расстояние не больше. Пары хранятся
+    по корзинам числа единичных бит маски: доминировать могут только пары из
+    корзин не старше, быть доминируемыми — только из корзин не младше.
+    С нулевыми расстояниями работает как множество минимальных по включению масок.
+    """
+    __slots__ = ("_buckets",)
+
+    def __init__(self) -> None:
+        self._buckets: list[dict[int, int]] = []
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._buckets)
+
+    def insert(self, mask: int, distance: int = 0) -> bool:
+        """
+        Добавляет пару и удаляет доминируемые ею. Возвращает False, если пара
+        сама доминируема и не добавлена.
+        """
+        if self.dominates(mask, distance):
+            return False
+        rank = mask.bit_count()
+        buckets = self._buckets
+        if rank >= len(buckets):
+            buckets.extend({} for _ in range(rank + 1 - len(buckets)))
+        for bucket in buckets[rank:]:
+            dominated = [other_mask for other_mask, other_distance
+                         in bucket.items()
+                         if (other_mask & mask) == mask
+                         and other_distance >= distance]
+            for other_mask in dominated:
+                del bucket[other_mask]
+        buckets[rank][mask] = distance
+        return True
+
+    def dominates(self, mask: int, distance: int = 0) -> bool:
+        """
+        Проверяет, доминирует ли над парой какая-нибудь из хранимых.
+        """
+        for bucket in self._buckets[:mask.bit_count() + 1]:
+            for other_mask, other_distance in bucket.items():
+                if (other_mask & mask) == other_mask and other_distance <= distance:
+                    return True
+        return False
+
+    def items(self) -> list[tuple[int, int]]:
+        """
+        Возвращает пары (маска, расстояние) в порядке возрастания числа дверей.
+        """
+        return [pair for bucket in self._buckets for pair in bucket.items()]
+
+
+class SolveStats:
+    """
+    Счётчики и времена фаз одного вызова solve. Передаётся в solve(stats=...)
+    и заполняется по ходу решения; без него инструментирование не выполняется.
+    Фильтр Парето встроен в BFS, поэтому его время входит в фазу "graph".
+    """
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self.bfs_cells: list[int] = []
+        self.removed_cells = 0
+        self.dropped_doors = 0
+        self.graph_edges = 0
+        self.graph_variants = 0
+        self.subproblems = 0
+        self.pushed = 0
+        self.popped = 0
+        self.stale = 0
+        self.peak_queue = 0
+        self.best_cost_size = 0
+        self._mark = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        """
+        Добавляет к фазе время, прошедшее с предыдущей отметки.
+        """
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._mark
+        self._mark = now
+
+    def record_graph(self, graph: list[dict[int, list[tuple[int, int]]]]
+                     ) -> None:
+        """
+        Запоминает число рёбер и вариантов (маска, расстояние) графа.
+        """
+        self.graph_edges = sum(len(adjacency) for adjacency in graph)
+        self.graph_variants = sum(len(variants) for adjacency in graph
+                                  for variants in adjacency.values())
+
+    def wrap_frontier(self, push: Callable, pop: Callable, queue,
+                      best_cost: dict[int, int]) -> tuple[Callable, Callable]:
+        """
+        Оборачивает push и pop очереди A* счётчиками добавленных, извлечённых
+        и устаревших состояний и пикового размера очереди.
+        """
+        def counting_push(entry: tuple[int, int, int]) -> None:
+            push(entry)
+            self.pushed += 1
+            if len(queue) > self.peak_queue:
+                self.peak_queue = len(queue)
+
+        def counting_pop() -> tuple[int, int, int]:
+            entry = pop()
+            self.popped += 1
+            if entry[1] > best_cost[entry[2]]:
+                self.stale += 1
+            return entry
+
+        return counting_push, counting_pop
+
+    def to_dict(self) -> dict:
+        """
+        Возвращает статистику в виде словаря, пригодного для json.dumps.
+        """
+        cells = self.bfs_cells
+        return {
+            "phases": self.phases,
+            "removed_cells": self.removed_cells,
+            "dropped_doors": self.dropped_doors,
+            "bfs_sources": len(cells),
+            "bfs_cells_total": sum(cells),
+            "bfs_cells_max": max(cells, default=0),
+            "bfs_cells": cells,
+            "graph_edges": self.graph_edges,
+            "graph_variants": self.graph_variants,
+            "subproblems": self.subproblems,
+            "pushed": self.pushed,
+            "popped": self.popped,
+            "stale": self.stale,
+            "peak_queue": self.peak_queue,
+            "best_cost_size": self.best_cost_size,
+        }
+
+
+# Ключи и двери: латиница a-z/A-Z, затем кириллица и греческий. В плоской сетке
+# каждая клетка — один байт, поэтому не-ASCII буквы хранятся внутренними кодами:
+# ключи с EXTENDED_KEY_BASE, двери с EXTENDED_DOOR_BASE
+EXTENDED_KEYS = "абвгдежзийклмнопрстуфхцчшщъыьэюяαβγδεζηθικλμνξοπρστυφχψω"
+EXTENDED_DOORS = EXTENDED_KEYS.upper()
+EXTENDED_KEY_BASE = 0x80
+EXTENDED_DOOR_BASE = 0xC0
+KEY_CODES = bytes(range(ord('a'), ord('z') + 1)) + bytes(
+    range(EXTENDED_KEY_BASE, EXTENDED_KEY_BASE + len(EXTENDED_KEYS)))
+DOOR_CODES = bytes(range(ord('A'), ord('Z') + 1)) + bytes(
+    range(EXTENDED_DOOR_BASE, EXTENDED_DOOR_BASE + len(EXTENDED_DOORS)))
+DOOR_OF_KEY = dict(zip(KEY_CODES, DOOR_CODES))
+
+
+class _CellEncoding(dict):
+    """
+    Таблица для str.translate: прочие не-ASCII символы становятся '?' (проходимая клетка).
+    """
+
+    def __missing__(self, code: int) -> str:
+        return "?"
+
+
+def _cell_encoding() -> _CellEncoding:
+    table = _CellEncoding((code, code) for code in range(128))
+    for index, (key, door) in enumerate(zip(EXTENDED_KEYS, EXTENDED_DOORS)):
+        table[ord(key)] = EXTENDED_KEY_BASE + index
+        table[ord(door)] = EXTENDED_DOOR_BASE + index
+    return table
+
+
+CELL_ENCODING = _cell_encoding()
+
+
+def encode_cells(text: str) -> bytes:
+    """
+    Переводит текст лабиринта в байты клеток: буквы расширенного алфавита — во внутренние коды.
+    """
+    if text.isascii():
+        return text.encode()
+    return text.translate(CELL_ENCODING).encode("latin-1")
+
+
+def cell_masks_table(key_codes: Sequence[int]) -> list[int]:
+    """
+    Таблица по коду клетки: -1 для стен, переводов строк и дверей без ключа,
+    для двери ключа key_codes[i] — бит 1 << i, иначе 0.
+    """
+    table = [0] * 256
+    table[ord('#')] = table[ord('\n')] = -1
+    for door_code in DOOR_CODES:
+        table[door_code] = -1
+    for key_index, key_code in enumerate(key_codes):
+        table[DOOR_OF_KEY[key_code]] = 1 << key_index
+    return table
+
+
+def grid_cell_masks(cells: bytes, point_cells: Sequence[int]) -> list[int]:
+    """
+    Маски клеток сетки для обходов. Биты дверей идут в порядке ключей среди
+    точек (как в index_points), поэтому совпадают с битами ключей в A*.
+    """
+    table = cell_masks_table([cells[cell] for cell in point_cells
+                              if cells[cell] in KEY_CODES])
+    return [table[code] for code in cells]
+
+
+# Файлы кэша графов: заголовок (магия, версия, флаги, число точек, число ключей, ответ),
+# затем тело — массив int64. Смена версии делает старые записи недействительными
+GRAPH_CACHE_MAGIC = b"TCKM"
+GRAPH_CACHE_VERSION = 2
+GRAPH_CACHE_HEADER = struct.Struct("<4sHHIIq")
+GRAPH_CACHE_HAS_ANSWER = 1
+GRAPH_CACHE_MAX_BYTES = 64 * 1024 * 1024
 
 
 def get_input() -> list[list[str]]:
@@ -28,20 +316,20 @@ def get_input() -> list[list[str]]:
     return [list(line.strip("\n")) for line in sys.stdin]
 
 
+def get_input_bytes() -> FlatGrid:
+    """
+    Читает лабиринт из стандартного ввода одним вызовом и возвращает его плоское представление.
+    """
+    return read_flat_grid(sys.stdin.buffer.read())
+
+
 def parse_grid(grid: list[list[str]]) -> ParsedGrid:
     """
     Находит стартовые позиции роботов и позиции ключей в сетке.
-    Возвращает ParsedGrid: start_positions и key_positions.
+    Возвращает ParsedGrid: start_positions и key_positions; ключи расширенного
+    алфавита называются символами своих внутренних кодов, как в parse_flat_grid.
     """
-    start_positions: list[Position] = []
-    key_positions: dict[str, Position] = {}
-    for r, row in enumerate(grid):
-        for c, cell in enumerate(row):
-            if cell == '@':
-                start_positions.append((r, c))
-            elif 'a' <= cell <= 'z':
-                key_positions[cell] = (r, c)
-    return ParsedGrid(start_positions, key_positions)
+    return parse_flat_grid(flatten_grid(grid))
 
 
 def index_points(
@@ -59,186 +347,1146 @@ def index_points(
     return all_points, coordinate_to_index
 
 
+def flatten_grid(grid: list[list[str]]) -> FlatGrid:
+    """
+    Переводит сетку в плоский массив байтов с шагом строки stride = cols + 1.
+    Последний байт каждой строки и строки-поля сверху и снизу — перевод строки,
+    он считается стеной, поэтому при обходе не нужны проверки границ.
+    """
+    num_rows, num_cols = len(grid), len(grid[0])
+    stride = num_cols + 1
+    padding = "\n" * stride
+    body = "\n".join("".join(row[:num_cols]).ljust(num_cols, "#")
+                     for row in grid)
+    cells = encode_cells(padding + body + "\n" + padding)
+    return FlatGrid(cells, stride, num_rows, num_cols)
+
+
+def read_flat_grid(data: bytes) -> FlatGrid:
+    """
+    Строит FlatGrid прямо из байтов ввода: строки уже разделены переводами строк,
+    поэтому для прямоугольного лабиринта достаточно дописать строки-поля.
+    Непрямоугольный ввод разбирается построчно через flatten_grid.
+    Не-ASCII ввод читается как UTF-8 и перекодируется encode_cells.
+    """
+    text = None
+    if not data.isascii():
+        text = data.decode("utf-8", "replace")
+        data = encode_cells(text)
+    trailing_newline = data.endswith(b"\n")
+    size = len(data) - trailing_newline
+    num_cols = data.find(b"\n")
+    if num_cols < 0:
+        num_cols = size
+    stride = num_cols + 1
+    num_rows = (size + 1) // stride
+    if (num_rows * stride != size + 1
+            or data.count(b"\n") != num_rows - 1 + trailing_newline
+            or data[num_cols:size:stride] != b"\n" * (num_rows - 1)):
+        lines = (data.decode() if text is None else text).split("\n")
+        if trailing_newline:
+            lines.pop()
+        return flatten_grid([list(line) for line in lines])
+    padding = b"\n" * stride
+    cells = padding + data + (b"" if trailing_newline else b"\n") + padding
+    return FlatGrid(cells, stride, num_rows, num_cols)
+
+
+def parse_flat_grid(flat: FlatGrid) -> ParsedGrid:
+    """
+    Находит стартовые позиции и ключи в плоской сетке поиском по байтам.
+    Как и parse_grid, для повторяющегося ключа берёт последнее вхождение.
+    """
+    cells, stride = flat.cells, flat.stride
+    start_positions: list[Position] = []
+    index = cells.find(b"@")
+    while index >= 0:
+        start_positions.append((index // stride - 1, index % stride))
+        index = cells.find(b"@", index + 1)
+
+    key_positions: dict[str, Position] = {}
+    key_codes = KEY_CODES[:26] if cells.isascii() else KEY_CODES
+    for code in key_codes:
+        index = cells.rfind(code)
+        if index >= 0:
+            key_positions[chr(code)] = (index // stride - 1, index % stride)
+    return ParsedGrid(start_positions, key_positions)
+
+
+def cell_index(flat: FlatGrid, position: Position) -> int:
+    """
+    Возвращает индекс клетки (row, col) в плоском массиве.
+    """
+    row, col = position
+    return (row + 1) * flat.stride + col
+
+
+def reachable_cells(cells: bytearray, stride: int, sources: list[int],
+                    blocked: int) -> bytearray:
+    """
+    Отмечает клетки, достижимые из sources без учёта дверей, не заходя в клетку blocked.
+    """
+    offsets = (stride, -stride, 1, -1)
+    wall, newline = ord('#'), ord('\n')
+    seen = bytearray(len(cells))
+    seen[blocked] = 1
+    frontier = [cell for cell in sources if cell != blocked]
+    for cell in frontier:
+        seen[cell] = 1
+    while frontier:
+        next_frontier = []
+        for cell in frontier:
+            for offset in offsets:
+                new_cell = cell + offset
+                if seen[new_cell] or cells[new_cell] in (wall, newline):
+                    continue
+                seen[new_cell] = 1
+                next_frontier.append(new_cell)
+        frontier = next_frontier
+    seen[blocked] = 0
+    return seen
+
+
+def prune_grid(flat: FlatGrid) -> PruneReport:
+    """
+    Упрощает лабиринт, не меняя ответа: заливает тупики и двери без ключей стенами
+    и снимает двери, путь к которым лежит через их ключ.
+    Возвращает новую сетку и число удалённых клеток и снятых дверей.
+    """
+    cells = bytearray(flat.cells)
+    stride = flat.stride
+    offsets = (stride, -stride, 1, -1)
+    wall, newline = ord('#'), ord('\n')
+    parsed = parse_flat_grid(flat)
+    present_keys = set(parsed.key_positions)
+    removed_cells = 0
+
+    for key_code, door_code in DOOR_OF_KEY.items():
+        if chr(key_code) in present_keys:
+            continue
+        removed_cells += cells.count(door_code)
+        cells = cells.replace(bytes((door_code,)), b"#")
+
+    def is_dead_end(cell: int) -> bool:
+        code = cells[cell]
+        if (code in (wall, newline) or code == ord('@')
+                or code in KEY_CODES):
+            return False
+        return sum(cells[cell + offset] not in (wall, newline)
+                   for offset in offsets) <= 1
+
+    candidates = [cell for cell in range(len(cells)) if is_dead_end(cell)]
+    while candidates:
+        cell = candidates.pop()
+        if not is_dead_end(cell):
+            continue
+        cells[cell] = wall
+        removed_cells += 1
+        candidates.extend(cell + offset for offset in offsets)
+
+    start_cells = [cell_index(flat, position)
+                   for position in parsed.start_positions]
+    dropped_doors = 0
+    for key, position in parsed.key_positions.items():
+        door = bytes((DOOR_OF_KEY[ord(key)],))
+        door_cells = []
+        index = cells.find(door)
+        while index >= 0:
+            door_cells.append(index)
+            index = cells.find(door, index + 1)
+        if not door_cells:
+            continue
+        seen = reachable_cells(cells, stride, start_cells,
+                               cell_index(flat, position))
+        for door_cell in door_cells:
+            if not seen[door_cell]:
+                cells[door_cell] = ord('.')
+                dropped_doors += 1
+
+    pruned = FlatGrid(bytes(cells), stride, flat.rows, flat.cols)
+    return PruneReport(pruned, removed_cells, dropped_doors)
+
+
+def bfs_from_point(
+        cell_masks: list[int],
+        stride: int,
+        start_cell: int,
+        source_index: int,
+        point_of_cell: list[int],
+        visited_cells: list[int] | None = None
+) -> dict[int, list[tuple[int, int]]]:
+    """
+    Обход в ширину из одной точки по плоской сетке.
+    cell_masks[i] — -1 для стены, иначе бит двери клетки (0 для проходимой клетки).
+    Возвращает словарь target_index -> [(door_mask, distance), ...], в котором
+    оставлены только недоминируемые варианты.
+    Если передан visited_cells, в него дописываются индексы посещённых клеток.
+    """
+    frontiers: dict[int, ParetoFrontier] = {}
+    offsets = (stride, -stride, 1, -1)
+    # Маски посещения клетки: None — не посещена, int — единственная маска
+    # (частый случай), ParetoFrontier — несколько несравнимых масок
+    visited_masks: list[int | ParetoFrontier | None] = [None] * len(cell_masks)
+    visited_masks[start_cell] = 0
+    level_cells, level_masks = [start_cell], [0]
+    distance = 0
+
+    while level_cells:
+        next_cells, next_masks = [], []
+        new_distance = distance + 1
+        for cell, door_mask in zip(level_cells, level_masks):
+            target_index = point_of_cell[cell]
+            if target_index >= 0 and target_index != source_index:
+                frontier = frontiers.get(target_index)
+                if frontier is None:
+                    frontier = frontiers[target_index] = ParetoFrontier()
+                frontier.insert(door_mask, distance)
+
+            for offset in offsets:
+                new_cell = cell + offset
+                cell_mask = cell_masks[new_cell]
+                if cell_mask < 0:
+                    continue
+                new_door_mask = door_mask | cell_mask
+
+                # Уровни BFS идут по возрастанию расстояния, поэтому достаточно
+                # сравнивать маски: расстояния в ParetoFrontier оставлены нулевыми
+                previous = visited_masks[new_cell]
+                if previous is None:
+                    visited_masks[new_cell] = new_door_mask
+                elif previous.__class__ is int:
+                    if (previous & new_door_mask) == previous:
+                        continue
+                    masks = ParetoFrontier()
+                    masks.insert(previous)
+                    masks.insert(new_door_mask)
+                    visited_masks[new_cell] = masks
+                elif not previous.insert(new_door_mask):
+                    continue
+
+                next_cells.append(new_cell)
+                next_masks.append(new_door_mask)
+        level_cells, level_masks = next_cells, next_masks
+        distance = new_distance
+
+    if visited_cells is not None:
+        visited_cells.extend(compress(range(len(visited_masks)),
+                                      [masks is not None
+                                       for masks in visited_masks]))
+    return defaultdict(list, ((target_index, frontier.items())
+                              for target_index, frontier in frontiers.items()))
+
+
+# Состояние процесса-воркера параллельного построения графа: (cell_masks, stride, point_of_cell)
+_worker_state: tuple[list[int], int, list[int]] | None = None
+
+
+def _init_bfs_worker(shared_name: str, size: int, stride: int,
+                     point_cells: list[int]) -> None:
+    """
+    Инициализатор воркера: один раз читает сетку из разделяемой памяти и готовит таблицы.
+    """
+    global _worker_state
+    shared = shared_memory.SharedMemory(name=shared_name)
+    try:
+        cells = bytes(shared.buf[:size])
+    finally:
+        shared.close()
+    point_of_cell = [-1] * size
+    for index, cell in enumerate(point_cells):
+        point_of_cell[cell] = index
+    _worker_state = (grid_cell_masks(cells, point_cells), stride,
+                     point_of_cell)
+
+
+def _bfs_worker_task(sources: list[tuple[int, int]], count_cells: bool = False
+                     ) -> list[tuple[int, dict[int, list[tuple[int, int]]], int]]:
+    """
+    Выполняет BFS для пар (source_index, start_cell) и возвращает строки графа
+    вместе с числом посещённых клеток (0, если count_cells=False).
+    """
+    cell_masks, stride, point_of_cell = _worker_state
+    rows = []
+    for source_index, start_cell in sources:
+        visited_cells = [] if count_cells else None
+        adjacency = bfs_from_point(cell_masks, stride, start_cell,
+                                   source_index, point_of_cell, visited_cells)
+        rows.append((source_index, dict(adjacency),
+                     len(visited_cells) if count_cells else 0))
+    return rows
+
+
 def build_reachability_graph(
-        grid: list[list[str]],
+        grid: list[list[str]] | FlatGrid,
         points: list[Position],
-        coordinate_to_index: dict[Position, int]
+        coordinate_to_index: dict[Position, int],
+        workers: int = 1,
+        visited_counts: list[int] | None = None
 ) -> list[dict[int, list[tuple[int, int]]]]:
     """
     Для каждой точки рассчитывает все достижимые другие точки вместе с маской дверей и расстоянием.
     Возвращает список словарей: graph[source_index][target_index] = [(door_mask, distance), ...].
+    При workers > 1 обходы из разных точек выполняются в пуле процессов.
+    Если передан visited_counts, в него дописывается число клеток, посещённых из каждой точки.
     """
-    number_of_points = len(points)
-    num_rows, num_cols = len(grid), len(grid[0])
-    graph = [defaultdict(list) for _ in range(number_of_points)]
-
-    for source_index, (start_row, start_col) in enumerate(points):
-        visited_masks = {(start_row, start_col): [0]}
-        bfs_queue = deque(
-            [(start_row, start_col, 0, 0)])
-
-        while bfs_queue:
-            row, col, distance, door_mask = bfs_queue.popleft()
-            target_index = coordinate_to_index.get((row, col))
-            if target_index is not None and target_index != source_index:
-                graph[source_index][target_index].append((door_mask, distance))
-
-            for d_row, d_col in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-                new_row, new_col = row + d_row, col + d_col
-                if not (0 <= new_row < num_rows and 0 <= new_col < num_cols):
-                    continue
-                cell_value = grid[new_row][new_col]
-                if cell_value == '#':
-                    continue
+    flat = grid if isinstance(grid, FlatGrid) else flatten_grid(grid)
+    if workers > 1 and len(points) > 1:
+        return _build_reachability_graph_parallel(
+            flat, points, coordinate_to_index, workers, visited_counts)
+    cell_masks = grid_cell_masks(flat.cells, [cell_index(flat, point)
+                                              for point in points])
+    point_of_cell = [-1] * len(flat.cells)
+    for position, index in coordinate_to_index.items():
+        point_of_cell[cell_index(flat, position)] = index
 
-                new_distance = distance + 1
-                new_door_mask = door_mask
-                if 'A' <= cell_value <= 'Z':
-                    door_key_index = ord(cell_value.lower()) - ord('a')
-                    new_door_mask |= (1 << door_key_index)
+    if visited_counts is None:
+        return [
+            bfs_from_point(cell_masks, flat.stride, cell_index(flat, point),
+                           source_index, point_of_cell)
+            for source_index, point in enumerate(points)
+        ]
+    graph = []
+    for source_index, point in enumerate(points):
+        visited_cells: list[int] = []
+        graph.append(bfs_from_point(cell_masks, flat.stride,
+                                    cell_index(flat, point), source_index,
+                                    point_of_cell, visited_cells))
+        visited_counts.append(len(visited_cells))
+    return graph
 
-                previous_masks = visited_masks.get((new_row, new_col))
-                if previous_masks:
 
-                    if any((old_mask & new_door_mask) == old_mask for old_mask
-                           in previous_masks):
-                        continue
+def _build_reachability_graph_parallel(
+        flat: FlatGrid,
+        points: list[Position],
+        coordinate_to_index: dict[Position, int],
+        workers: int,
+        visited_counts: list[int] | None = None
+) -> list[dict[int, list[tuple[int, int]]]]:
+    """
+    Распределяет точки-источники по процессам. Сетка передаётся воркерам один раз
+    через разделяемую память, а не вместе с каждой задачей; строки графа
+    собираются обратно по индексам источников.
+    """
+    point_cells = [0] * len(coordinate_to_index)
+    for position, index in coordinate_to_index.items():
+        point_cells[index] = cell_index(flat, position)
+    sources = [(source_index, cell_index(flat, point))
+               for source_index, point in enumerate(points)]
+    workers = min(workers, len(sources))
+    batches = [sources[offset::workers] for offset in range(workers)]
 
-                    visited_masks[(new_row, new_col)] = [
-                        mask for mask in previous_masks
-                        if not ((new_door_mask & mask) == new_door_mask)]
-                    visited_masks[(new_row, new_col)].append(new_door_mask)
-                else:
-                    visited_masks[(new_row, new_col)] = [new_door_mask]
+    graph: list[dict[int, list[tuple[int, int]]]] = [
+        defaultdict(list) for _ in points]
+    counts = [0] * len(points)
+    task = partial(_bfs_worker_task, count_cells=visited_counts is not None)
+    shared = shared_memory.SharedMemory(create=True, size=len(flat.cells))
+    try:
+        shared.buf[:len(flat.cells)] = flat.cells
+        with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_bfs_worker,
+                initargs=(shared.name, len(flat.cells), flat.stride,
+                          point_cells)) as pool:
+            for rows in pool.map(task, batches):
+                for source_index, adjacency, count in rows:
+                    graph[source_index].update(adjacency)
+                    counts[source_index] = count
+    finally:
+        shared.close()
+        shared.unlink()
+    if visited_counts is not None:
+        visited_counts.extend(counts)
+    return graph
 
-                bfs_queue.append(
-                    (new_row, new_col, new_distance, new_door_mask))
 
-    return graph
+def build_junction_graph(flat: FlatGrid,
+                         point_cells: list[int]) -> JunctionGraph:
+    """
+    Сжимает коридоры сетки во взвешенный граф. Узлы — точки интереса, двери и
+    клетки, у которых число проходимых соседей не равно двум; рёбра — коридоры
+    между ними с длиной в шагах. node_bits[v] — бит двери узла v (0, если это не дверь),
+    он добавляется к маске пути при входе в узел.
+    """
+    cell_masks = grid_cell_masks(flat.cells, point_cells)
+    offsets = (flat.stride, -flat.stride, 1, -1)
+    special = set(point_cells)
+
+    node_of_cell: dict[int, int] = {}
+    node_cells: list[int] = []
+    for cell, cell_mask in enumerate(cell_masks):
+        if cell_mask < 0:
+            continue
+        if (cell_mask or cell in special
+                or sum(cell_masks[cell + offset] >= 0
+                       for offset in offsets) != 2):
+            node_of_cell[cell] = len(node_cells)
+            node_cells.append(cell)
+
+    edges: list[list[tuple[int, int]]] = []
+    for node, cell in enumerate(node_cells):
+        shortest: dict[int, int] = {}
+        for offset in offsets:
+            previous, current = cell, cell + offset
+            if cell_masks[current] < 0:
+                continue
+            length = 1
+            while current not in node_of_cell:
+                for step in offsets:
+                    following = current + step
+                    if following != previous and cell_masks[following] >= 0:
+                        break
+                previous, current = current, following
+                length += 1
+            neighbour = node_of_cell[current]
+            if neighbour != node and length < shortest.get(neighbour,
+                                                           length + 1):
+                shortest[neighbour] = length
+        edges.append(list(shortest.items()))
+
+    node_bits = [cell_masks[cell] for cell in node_cells]
+    return JunctionGraph(node_of_cell, node_bits, edges)
+
+
+def search_junction_graph(
+        junctions: JunctionGraph,
+        source_node: int,
+        source_index: int,
+        point_of_node: dict[int, int]
+) -> dict[int, list[tuple[int, int]]]:
+    """
+    Дейкстра по сжатому графу с Парето-метками (маска дверей, расстояние) в узлах:
+    метка отбрасывается, если в узле уже есть метка с подмножеством её дверей.
+    Возвращает словарь target_index -> [(door_mask, distance), ...].
+    """
+    frontiers: dict[int, ParetoFrontier] = {}
+    node_bits, edges = junctions.node_bits, junctions.edges
+    settled_masks: dict[int, ParetoFrontier] = {}
+    queue = [(0, 0, source_node)]
+    while queue:
+        distance, door_mask, node = heapq.heappop(queue)
+        masks = settled_masks.get(node)
+        if masks is None:
+            masks = settled_masks[node] = ParetoFrontier()
+        if not masks.insert(door_mask):
+            continue
+
+        target_index = point_of_node.get(node)
+        if target_index is not None and target_index != source_index:
+            frontier = frontiers.get(target_index)
+            if frontier is None:
+                frontier = frontiers[target_index] = ParetoFrontier()
+            frontier.insert(door_mask, distance)
+
+        for neighbour, length in edges[node]:
+            new_door_mask = door_mask | node_bits[neighbour]
+            known = settled_masks.get(neighbour)
+            if known is not None and known.dominates(new_door_mask):
+                continue
+            heapq.heappush(queue, (distance + length, new_door_mask, neighbour))
+    return defaultdict(list, ((target_index, frontier.items())
+                              for target_index, frontier in frontiers.items()))
+
+
+def build_reachability_graph_contracted(
+        grid: list[list[str]] | FlatGrid,
+        points: list[Position],
+        coordinate_to_index: dict[Position, int]
+) -> list[dict[int, list[tuple[int, int]]]]:
+    """
+    То же, что build_reachability_graph, но поиски из точек идут по сжатому графу
+    коридоров, а не по клеткам. Выгодно для лабиринтов с длинными коридорами.
+    """
+    flat = grid if isinstance(grid, FlatGrid) else flatten_grid(grid)
+    point_cells = [cell_index(flat, point) for point in points]
+    junctions = build_junction_graph(flat, point_cells)
+    point_of_node = {junctions.node_of_cell[cell]: coordinate_to_index[point]
+                     for cell, point in zip(point_cells, points)}
+    return [
+        search_junction_graph(junctions, junctions.node_of_cell[cell],
+                              source_index, point_of_node)
+        for source_index, cell in enumerate(point_cells)
+    ]
 
 
 def apply_pareto_filter(
         graph: list[dict[int, list[tuple[int, int]]]]) -> None:
     """
     Оставляет в каждой ячейке graph[source][target] только недоминируемые варианты (по двери и расстоянию).
+    Графы из build_reachability_graph уже отфильтрованы; функция нужна для графов из других источников.
     """
-    for source_index in range(len(graph)):
-        for target_index, variants in list(graph[source_index].items()):
-            best_distances = {}
+    for adjacency in graph:
+        for target_index, variants in adjacency.items():
+            frontier = ParetoFrontier()
             for mask, distance in variants:
-                if (mask not in best_distances
-                        or distance < best_distances[mask]):
-                    best_distances[mask] = distance
+                frontier.insert(mask, distance)
+            adjacency[target_index] = frontier.items()
 
-            filtered = []
-            for mask, distance in best_distances.items():
-                is_dominated = any(
-                    other_mask != mask and
-                    (other_mask & mask) == other_mask and
-                    best_distances[other_mask] <= distance
-                    for other_mask in best_distances
-                )
-                if not is_dominated:
-                    filtered.append((mask, distance))
 
-            graph[source_index][target_index] = filtered
+def compute_min_distances(
+        graph: list[dict[int, list[tuple[int, int]]]]) -> list[list[float]]:
+    """
+    Матрица кратчайших расстояний между точками без учёта дверей (inf, если пути нет).
+    """
+    number_of_points = len(graph)
+    min_distances = [[float('inf')] * number_of_points
+                     for _ in range(number_of_points)]
+    for source_index, adjacency in enumerate(graph):
+        for target_index, variants in adjacency.items():
+            if variants:
+                min_distances[source_index][target_index] = min(
+                    distance for _, distance in variants)
+    return min_distances
 
 
-def compute_minimum_edge_length(
-        graph: list[dict[int, list[tuple[int, int]]]]) -> int:
+def make_spanning_tree_heuristic(
+        min_distances: list[list[float]],
+        num_robots: int,
+        num_keys: int
+) -> Callable[[int], float]:
     """
-    Находит минимальное расстояние среди всех ребер графа, нужен для эвристики A*.
+    Эвристика A* по маске ключей: вес минимального остовного дерева на несобранных
+    ключах (кэшируется по маске; inf, если какой-то ключ недостижим).
     """
-    all_distances = [distance for adj in graph for variants in adj.values() for
-                     (mask, distance) in variants]
-    return min(all_distances) if all_distances else 0
+    cache: dict[int, float] = {}
 
+    def heuristic(keys_mask: int) -> float:
+        bound = cache.get(keys_mask)
+        if bound is not None:
+            return bound
+        remaining = [num_robots + key for key in range(num_keys)
+                     if not keys_mask >> key & 1]
+        occupied = list(range(num_robots)) + [
+            num_robots + key for key in range(num_keys) if keys_mask >> key & 1]
+        best = {key_point: min(min_distances[point][key_point]
+                               for point in occupied)
+                for key_point in remaining}
+        bound = 0
+        while best:
+            key_point = min(best, key=best.__getitem__)
+            bound += best.pop(key_point)
+            row = min_distances[key_point]
+            for other_point in best:
+                if row[other_point] < best[other_point]:
+                    best[other_point] = row[other_point]
+        cache[keys_mask] = bound
+        return bound
 
-def a_star_search(
+    return heuristic
+
+
+def pack_state(robot_positions: Iterable[int], keys_mask: int,
+               number_of_points: int) -> int:
+    """
+    Упаковывает состояние поиска в одно число: младшие number_of_points бит —
+    множество точек, занятых роботами, выше — маска собранных ключей.
+    Роботы одинаковы, поэтому хранится только множество их позиций: состояния,
+    различающиеся перестановкой роботов, совпадают.
+    """
+    state = keys_mask << number_of_points
+    for point in robot_positions:
+        state |= 1 << point
+    return state
+
+
+def compile_transitions(
         graph: list[dict[int, list[tuple[int, int]]]],
+        num_robots: int,
         num_keys: int
+) -> TransitionTable:
+    """
+    Переводит граф в плоскую таблицу переходов для A*: variants[source * num_keys + key] —
+    кортеж вариантов (required_mask, distance) пути из точки source к ключу key
+    по возрастанию расстояния, так что первый доступный вариант — лучший.
+    reachable_keys[source] — маска ключей, до которых из source вообще есть путь.
+    """
+    variants_table = []
+    reachable_keys = []
+    for adjacency in graph:
+        reachable = 0
+        for key in range(num_keys):
+            variants = adjacency.get(num_robots + key)
+            if variants:
+                reachable |= 1 << key
+            variants_table.append(tuple(sorted(
+                variants or (), key=lambda variant: variant[1])))
+        reachable_keys.append(reachable)
+    return TransitionTable(variants_table, reachable_keys)
+
+
+def a_star_search(
+        graph: list[dict[int, list[tuple[int, int]]]],
+        num_keys: int,
+        frontier: str = "heap",
+        stats: SolveStats | None = None
 ) -> int:
     """
     Выполняет A*-поиск по состояниям роботов и собранных ключей.
+    Первые len(graph) - num_keys точек графа — старты роботов, остальные — ключи.
     Возвращает минимальное число шагов или -1, если сбор всех ключей невозможен.
     """
     number_of_points = len(graph)
+    num_robots = number_of_points - num_keys
+    if num_robots <= 0:
+        return 0 if num_keys == 0 else -1
     all_keys_collected = (1 << num_keys) - 1
-    start_state = (0, 1, 2, 3, 0)
-    min_edge_length = compute_minimum_edge_length(graph)
-
-    def heuristic(state):
-        collected_mask = state[4]
-        collected_count = bin(collected_mask).count('1')
-        remaining_keys = num_keys - collected_count
-        return remaining_keys * min_edge_length
-
-    priority_queue = []
-    heapq.heappush(
-        priority_queue,
-        PriorityQueueEntry(
-            priority=heuristic(start_state),
-            cost=0,
-            state=start_state
-        )
-    )
+    robots_mask = (1 << number_of_points) - 1
+    start_state = pack_state(range(num_robots), 0, number_of_points)
+    heuristic = make_spanning_tree_heuristic(
+        compute_min_distances(graph), num_robots, num_keys)
+    transitions, reachable_keys = compile_transitions(graph, num_robots,
+                                                      num_keys)
+    infinity = float('inf')
+
+    if frontier == "heap":
+        priority_queue = []
+        push = partial(heapq.heappush, priority_queue)
+        pop = partial(heapq.heappop, priority_queue)
+    elif frontier == "bucket":
+        priority_queue = BucketQueue()
+        push, pop = priority_queue.push, priority_queue.pop
+    else:
+        raise ValueError(f"Неизвестная очередь: {frontier!r}")
+
+    start_estimate = heuristic(0)
+    if start_estimate == infinity:
+        return -1
     best_cost = {start_state: 0}
+    if stats is not None:
+        push, pop = stats.wrap_frontier(push, pop, priority_queue, best_cost)
+    push((start_estimate, 0, start_state))
 
     while priority_queue:
-        entry = heapq.heappop(priority_queue)
-        current_cost, current_state = entry.cost, entry.state
-        if current_cost > best_cost.get(current_state, float('inf')):
+        _, current_cost, current_state = pop()
+        if current_cost > best_cost[current_state]:
             continue
-        if current_state[4] == all_keys_collected:
+        keys_mask = current_state >> number_of_points
+        if keys_mask == all_keys_collected:
+            if stats is not None:
+                stats.best_cost_size += len(best_cost)
             return current_cost
 
-        robot_positions, keys_mask = current_state[:4], current_state[4]
-        for robot_index, robot_point in enumerate(robot_positions):
-            for target_point in range(4, number_of_points):
-                key_bit = 1 << (target_point - 4)
-
-                if keys_mask & key_bit:
-                    continue
-
-                for required_mask, distance in graph[robot_point].get(
-                        target_point, []):
+        robots = []
+        reachable = 0
+        occupied = current_state & robots_mask
+        while occupied:
+            robot_bit = occupied & -occupied
+            occupied ^= robot_bit
+            robot_point = robot_bit.bit_length() - 1
+            robot_keys = reachable_keys[robot_point] & ~keys_mask
+            if robot_keys:
+                reachable |= robot_keys
+                robots.append((robot_point * num_keys,
+                               current_state ^ robot_bit))
+        candidates = reachable
+        while candidates:
+            key_bit = candidates & -candidates
+            candidates ^= key_bit
+            key = key_bit.bit_length() - 1
+            moved = key_bit << number_of_points | 1 << (num_robots + key)
+            estimate = None
+            for row_start, other_robots in robots:
+                for required_mask, distance in transitions[row_start + key]:
                     if required_mask & ~keys_mask:
                         continue
-
-                    new_keys_mask = keys_mask | key_bit
-                    new_positions = list(robot_positions)
-                    new_positions[robot_index] = target_point
-                    new_state = (*new_positions, new_keys_mask)
                     tentative_cost = current_cost + distance
-                    if tentative_cost < best_cost.get(new_state, float('inf')):
-                        best_cost[new_state] = tentative_cost
-                        heapq.heappush(
-                            priority_queue,
-                            PriorityQueueEntry(
-                                priority=tentative_cost + heuristic(new_state),
-                                cost=tentative_cost,
-                                state=new_state
-                            )
-                        )
+                    new_state = other_robots | moved
+                    if tentative_cost < best_cost.get(new_state, infinity):
+                        if estimate is None:
+                            estimate = heuristic(keys_mask | key_bit)
+                        if estimate != infinity:
+                            best_cost[new_state] = tentative_cost
+                            push((tentative_cost + estimate, tentative_cost,
+                                  new_state))
+                    break
+    if stats is not None:
+        stats.best_cost_size += len(best_cost)
     return -1
 
 
-def solve(grid: list[list[str]]) -> int:
+def decompose_graph(
+        graph: list[dict[int, list[tuple[int, int]]]],
+        num_keys: int
+) -> list[Subproblem] | None:
+    """
+    Делит задачу на независимые подзадачи по связным областям роботов.
+    Возвращает список Subproblem или None, если какой-то ключ недостижим ни для одного робота.
+    """
+    num_robots = len(graph) - num_keys
+    region_of_robot = [-1] * num_robots
+    regions: list[list[int]] = []
+    for robot in range(num_robots):
+        if region_of_robot[robot] >= 0:
+            continue
+        region_of_robot[robot] = len(regions)
+        members = [robot]
+        for other in range(robot + 1, num_robots):
+            if region_of_robot[other] < 0 and other in graph[robot]:
+                region_of_robot[other] = len(regions)
+                members.append(other)
+        regions.append(members)
+
+    region_keys: list[list[int]] = [[] for _ in regions]
+    region_of_key = []
+    for key in range(num_keys):
+        region = next((region_of_robot[robot] for robot in range(num_robots)
+                       if num_robots + key in graph[robot]), -1)
+        if region < 0:
+            return None
+        region_of_key.append(region)
+        region_keys[region].append(key)
+
+    depends_on: list[set[int]] = [set() for _ in regions]
+    for region, members in enumerate(regions):
+        key_points = [num_robots + key for key in region_keys[region]]
+        for point in members + key_points:
+            for target, variants in graph[point].items():
+                if target < num_robots:
+                    continue
+                for required_mask, _ in variants:
+                    while required_mask:
+                        key_bit = required_mask & -required_mask
+                        required_mask ^= key_bit
+                        other = region_of_key[key_bit.bit_length() - 1]
+                        if other != region:
+                            depends_on[region].add(other)
+
+    reachable_regions = []
+    for region in range(len(regions)):
+        seen = {region}
+        stack = [region]
+        while stack:
+            for other in depends_on[stack.pop()]:
+                if other not in seen:
+                    seen.add(other)
+                    stack.append(other)
+        reachable_regions.append(seen)
+
+    subproblems = []
+    merged = [False] * len(regions)
+    for region in range(len(regions)):
+        if merged[region]:
+            continue
+        cycle = [other for other in range(region, len(regions))
+                 if other in reachable_regions[region]
+                 and region in reachable_regions[other]]
+        robots, keys = [], []
+        for other in cycle:
+            merged[other] = True
+            robots.extend(regions[other])
+            keys.extend(region_keys[other])
+        subproblems.append(Subproblem(sorted(robots), sorted(keys)))
+    return subproblems
+
+
+def extract_subgraph(
+        graph: list[dict[int, list[tuple[int, int]]]],
+        num_keys: int,
+        subproblem: Subproblem
+) -> list[dict[int, list[tuple[int, int]]]]:
+    """
+    Вырезает из графа точки подзадачи и перенумеровывает их: сначала её роботы,
+    затем её ключи. Двери чужих ключей считаются открытыми, поэтому их биты
+    убираются из масок, а ставшие доминируемыми варианты отбрасываются.
+    """
+    num_robots = len(graph) - num_keys
+    points = subproblem.robots + [num_robots + key for key in subproblem.keys]
+    local_index = {point: index for index, point in enumerate(points)}
+    local_bit = {1 << key: 1 << index
+                 for index, key in enumerate(subproblem.keys)}
+
+    subgraph = []
+    for point in points:
+        adjacency = {}
+        for target, variants in graph[point].items():
+            target_index = local_index.get(target)
+            if target_index is None:
+                continue
+            frontier = ParetoFrontier()
+            for required_mask, distance in variants:
+                local_mask = 0
+                while required_mask:
+                    key_bit = required_mask & -required_mask
+                    required_mask ^= key_bit
+                    local_mask |= local_bit.get(key_bit, 0)
+                frontier.insert(local_mask, distance)
+            adjacency[target_index] = frontier.items()
+        subgraph.append(adjacency)
+    return subgraph
+
+
+def search_components(
+        graph: list[dict[int, list[tuple[int, int]]]],
+        num_keys: int,
+        frontier: str = "heap",
+        stats: SolveStats | None = None
+) -> int:
+    """
+    Решает задачу по подзадачам decompose_graph и складывает их ответы.
+    Роботы, которым нечего собирать, в поиск не попадают.
+    """
+    subproblems = decompose_graph(graph, num_keys)
+    if subproblems is None:
+        return -1
+    if stats is not None:
+        stats.subproblems = len(subproblems)
+    num_robots = len(graph) - num_keys
+    if len(subproblems) == 1 and len(subproblems[0].robots) == num_robots:
+        return a_star_search(graph, num_keys, frontier, stats)
+    total = 0
+    for subproblem in subproblems:
+        if not subproblem.keys:
+            continue
+        cost = a_star_search(extract_subgraph(graph, num_keys, subproblem),
+                             len(subproblem.keys), frontier, stats)
+        if cost < 0:
+            return -1
+        total += cost
+    return total
+
+
+class GraphCache:
+    """
+    Дисковый кэш отфильтрованных графов достижимости (и, по желанию, ответов),
+    ключ — хэш содержимого лабиринта. Каждая запись — отдельный файл в directory;
+    при превышении max_bytes удаляются записи, к которым дольше всего не обращались
+    (время обращения хранится в mtime файла).
+    """
+
+    def __init__(self, directory: str,
+                 max_bytes: int = GRAPH_CACHE_MAX_BYTES,
+                 store_answers: bool = True) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.store_answers = store_answers
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(flat: FlatGrid, prune: bool) -> str:
+        """
+        Хэш лабиринта вместе с параметрами, от которых зависит граф.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(struct.pack("<HBII", GRAPH_CACHE_VERSION, prune,
+                                  flat.stride, flat.rows))
+        digest.update(flat.cells)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.graph")
+
+    def load(self, key: str) -> CachedGraph | None:
+        """
+        Возвращает запись по ключу или None, если её нет или она повреждена.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        try:
+            entry = decode_cached_graph(data)
+        except ValueError:
+            os.remove(path)
+            return None
+        os.utime(path)
+        return entry
+
+    def store(self, key: str, graph: list[dict[int, list[tuple[int, int]]]],
+              num_keys: int, answer: int | None = None) -> None:
+        """
+        Сохраняет запись атомарно (через временный файл) и вытесняет старые записи.
+        """
+        if not self.store_answers:
+            answer = None
+        data = encode_cached_graph(graph, num_keys, answer)
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory,
+                                                 suffix=".tmp")
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(data)
+        os.replace(temporary, self._path(key))
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Удаляет самые давние записи, пока кэш больше max_bytes. Возвращает число удалённых.
+        """
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(".graph"):
+                    info = entry.stat()
+                    entries.append((info.st_mtime_ns, info.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+
+def encode_cached_graph(graph: list[dict[int, list[tuple[int, int]]]],
+                        num_keys: int, answer: int | None) -> bytes:
+    """
+    Кодирует граф в формат кэша. Тело — int64 подряд по точкам-источникам:
+    число целей, затем для каждой цели её индекс, число вариантов и пары (маска, расстояние).
+    """
+    body = array("q")
+    for adjacency in graph:
+        body.append(len(adjacency))
+        for target_index, variants in adjacency.items():
+            body.append(target_index)
+            body.append(len(variants))
+            for mask, distance in variants:
+                body.append(mask)
+                body.append(distance)
+    if sys.byteorder != "little":
+        body.byteswap()
+    flags = GRAPH_CACHE_HAS_ANSWER if answer is not None else 0
+    header = GRAPH_CACHE_HEADER.pack(GRAPH_CACHE_MAGIC, GRAPH_CACHE_VERSION,
+                                     flags, len(graph), num_keys,
+                                     answer if answer is not None else 0)
+    return header + body.tobytes()
+
+
+def decode_cached_graph(data: bytes) -> CachedGraph:
+    """
+    Разбирает запись кэша, закодированную encode_cached_graph.
+    """
+    if len(data) < GRAPH_CACHE_HEADER.size:
+        raise ValueError("Запись кэша слишком короткая")
+    magic, version, flags, number_of_points, num_keys, answer = (
+        GRAPH_CACHE_HEADER.unpack_from(data))
+    if magic != GRAPH_CACHE_MAGIC or version != GRAPH_CACHE_VERSION:
+        raise ValueError(
+            f"Запись не является графом кэша версии {GRAPH_CACHE_VERSION}")
+    if (len(data) - GRAPH_CACHE_HEADER.size) % 8:
+        raise ValueError("Размер записи кэша не кратен 8 байтам")
+    body = array("q", data[GRAPH_CACHE_HEADER.size:])
+    if sys.byteorder != "little":
+        body.byteswap()
+
+    graph = []
+    position = 0
+    try:
+        for _ in range(number_of_points):
+            adjacency = {}
+            number_of_targets = body[position]
+            position += 1
+            for _ in range(number_of_targets):
+                target_index, number_of_variants = (body[position],
+                                                    body[position + 1])
+                position += 2
+                end = position + 2 * number_of_variants
+                adjacency[target_index] = list(zip(body[position:end:2],
+                                                   body[position + 1:end:2]))
+                position = end
+            graph.append(adjacency)
+    except IndexError:
+        raise ValueError("Запись кэша обрезана") from None
+    if position != len(body):
+        raise ValueError("Размер записи кэша не совпадает с содержимым")
+    return CachedGraph(graph, num_keys,
+                       answer if flags & GRAPH_CACHE_HAS_ANSWER else None)
+
+
+class MazeSolver:
+    """
+    Решатель для лабиринта, который меняется по нескольку клеток между запусками:
+    после set_cell пересчитываются только строки графа точек, чей BFS затрагивал клетку.
+    """
+
+    def __init__(self, grid: list[list[str]] | FlatGrid,
+                 frontier: str = "heap") -> None:
+        flat = grid if isinstance(grid, FlatGrid) else flatten_grid(grid)
+        self.cells = bytearray(flat.cells)
+        self.stride, self.rows, self.cols = flat.stride, flat.rows, flat.cols
+        self.frontier = frontier
+        self._answer: int | None = None
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        """
+        Заново находит точки и строит все строки графа.
+        """
+        flat = FlatGrid(bytes(self.cells), self.stride, self.rows, self.cols)
+        parsed = parse_flat_grid(flat)
+        self.num_keys = len(parsed.key_positions)
+        points, coordinate_to_index = index_points(parsed.start_positions,
+                                                   parsed.key_positions)
+        self.point_cells = [cell_index(flat, point) for point in points]
+        self.mask_table = cell_masks_table(
+            [ord(key) for key in sorted(parsed.key_positions)])
+        self.cell_masks = [self.mask_table[code] for code in self.cells]
+        self.point_of_cell = [-1] * len(self.cells)
+        for position, index in coordinate_to_index.items():
+            self.point_of_cell[cell_index(flat, position)] = index
+        self.graph: list[dict[int, list[tuple[int, int]]]] = []
+        self.visited: list[set[int]] = []
+        for source_index in range(len(points)):
+            row, visited = self._bfs(source_index)
+            self.graph.append(row)
+            self.visited.append(visited)
+
+    def _bfs(self, source_index: int
+             ) -> tuple[dict[int, list[tuple[int, int]]], set[int]]:
+        """
+        Строит строку графа одного источника и множество посещённых клеток.
+        """
+        visited_cells: list[int] = []
+        row = bfs_from_point(self.cell_masks, self.stride,
+                             self.point_cells[source_index], source_index,
+                             self.point_of_cell, visited_cells)
+        return row, set(visited_cells)
+
+    def set_cell(self, row: int, col: int, char: str) -> int:
+        """
+        Меняет клетку (row, col) на символ char и обновляет граф.
+        Возвращает число пересчитанных строк графа.
+        """
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            raise IndexError(f"Клетка ({row}, {col}) вне лабиринта")
+        if len(char) != 1 or char == '\n':
+            raise ValueError(f"Недопустимый символ клетки: {char!r}")
+        cell = (row + 1) * self.stride + col
+        code = encode_cells(char)[0]
+        old_code = self.cells[cell]
+        if code == old_code:
+            return 0
+        self.cells[cell] = code
+        self.cell_masks[cell] = self.mask_table[code]
+        self._answer = None
+
+        if (self.point_of_cell[cell] >= 0 or code == ord('@')
+                or code in KEY_CODES):
+            self._rebuild()
+            return len(self.graph)
+
+        around = (cell, cell + self.stride, cell - self.stride,
+                  cell + 1, cell - 1)
+        recomputed = 0
+        for source_index, visited in enumerate(self.visited):
+            if any(neighbour in visited for neighbour in around):
+                self.graph[source_index], self.visited[source_index] = (
+                    self._bfs(source_index))
+                recomputed += 1
+        return recomputed
+
+    def solve(self) -> int:
+        """
+        Возвращает ответ для текущего лабиринта; без правок повторно не ищет.
+        """
+        if self._answer is None:
+            self._answer = search_components(self.graph, self.num_keys,
+                                             self.frontier)
+        return self._answer
+
+
+def solve(grid: list[list[str]] | FlatGrid, contract: bool = False,
+          prune: bool = True, frontier: str = "heap", workers: int = 1,
+          cache: GraphCache | None = None, decompose: bool = True,
+          stats: SolveStats | None = None) -> int:
     """
     Координирует разбор сетки, построение графа и запуск A*-поиска.
+    Принимает сетку списком списков символов или готовый FlatGrid;
+    в stats (SolveStats), если он передан, записывается статистика решения.
     """
-    parsed = parse_grid(grid)
+    search = search_components if decompose else a_star_search
+    flat = grid if isinstance(grid, FlatGrid) else flatten_grid(grid)
+    if stats is not None:
+        stats.lap("read")
+    if cache is not None:
+        cache_key = cache.key(flat, prune)
+        cached = cache.load(cache_key)
+        if stats is not None:
+            stats.lap("cache")
+        if cached is not None:
+            if cached.answer is not None:
+                return cached.answer
+            if stats is not None:
+                stats.record_graph(cached.graph)
+            answer = search(cached.graph, cached.num_keys, frontier, stats)
+            if stats is not None:
+                stats.lap("search")
+            if cache.store_answers:
+                cache.store(cache_key, cached.graph, cached.num_keys, answer)
+            return answer
+    if prune:
+        report = prune_grid(flat)
+        flat = report.grid
+        if stats is not None:
+            stats.lap("prune")
+            stats.removed_cells = report.removed_cells
+            stats.dropped_doors = report.dropped_doors
+    parsed = parse_flat_grid(flat)
+    if stats is not None:
+        stats.lap("parse")
     start_positions, key_positions = parsed.start_positions, parsed.key_positions
     points, coordinate_to_index = index_points(start_positions, key_positions)
-    graph = build_reachability_graph(grid, points, coordinate_to_index)
-    apply_pareto_filter(graph)
-    return a_star_search(graph, len(key_positions))
+    if stats is not None:
+        stats.lap("index")
+    if contract:
+        graph = build_reachability_graph_contracted(flat, points,
+                                                    coordinate_to_index)
+    else:
+        graph = build_reachability_graph(
+            flat, points, coordinate_to_index, workers,
+            None if stats is None else stats.bfs_cells)
+    if stats is not None:
+        stats.lap("graph")
+        stats.record_graph(graph)
+    answer = search(graph, len(key_positions), frontier, stats)
+    if stats is not None:
+        stats.lap("search")
+    if cache is not None:
+        cache.store(cache_key, graph, len(key_positions), answer)
+    return answer
 
 
 def main():
-    data = get_input()
-    result = solve(data)
+    parser = argparse.ArgumentParser(
+        description="Минимальное число шагов для сбора всех ключей роботами.")
+    parser.add_argument(
+        "--contract", action="store_true",
+        help="искать пути по сжатому графу коридоров")
+    parser.add_argument(
+        "--no-prune", dest="prune", action="store_false",
+        help="не упрощать лабиринт перед построением графа")
+    parser.add_argument(
+        "--frontier", choices=("heap", "bucket"), default="heap",
+        help="очередь A*: двоичная куча или очередь Дайала")
+    parser.add_argument(
+        "--workers", type=int, default=1, metavar="N",
+        help="строить граф достижимости в N процессах")
+    parser.add_argument(
+        "--cache", metavar="DIR",
+        help="каталог дискового кэша графов достижимости")
+    parser.add_argument(
+        "--cache-size", type=int, default=GRAPH_CACHE_MAX_BYTES, metavar="BYTES",
+        help="предельный размер кэша в байтах")
+    parser.add_argument(
+        "--no-cache-answers", dest="cache_answers", action="store_false",
+        help="хранить в кэше только граф, без ответа")
+    parser.add_argument(
+        "--no-decompose", dest="decompose", action="store_false",
+        help="не разбивать задачу на независимые области")
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="вывести в stderr статистику решения в формате JSON")
+    args = parser.parse_args()
+
+    cache = (GraphCache(args.cache, args.cache_size, args.cache_answers)
+             if args.cache else None)
+    stats = SolveStats() if args.stats else None
+    data = get_input_bytes()
+    result = solve(data, contract=args.contract, prune=args.prune,
+                   frontier=args.frontier, workers=args.workers, cache=cache,
+                   decompose=args.decompose, stats=stats)
     print(result)
+    if stats is not None:
+        print(json.dumps(stats.to_dict()), file=sys.stderr)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,274 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Callable
+
+from run import (OccupancyIndex, accumulate_day_deltas, check_capacity,
+                 check_capacity_ordinals, check_capacity_stream, day_occupancy,
+                 parse_date_ordinal, read_guests, sweep_day_deltas)
+
+DEFAULT_SIZES = [10 ** exponent for exponent in range(3, 8)]
+
+
+def write_feed(path: str, n: int, days: int, seed: int = 0) -> None:
+    """
+    Записывает в файл синтетический входной поток run.py из n гостей, чьи даты
+    заезда равномерно распределены по days дням. Вместимость — n // 4.
+    """
+    rng = random.Random(seed)
+    base = date(2021, 1, 1).toordinal()
+    iso = [date.fromordinal(base + day).isoformat() for day in range(days + 31)]
+    with open(path, "w") as file:
+        file.write(f"{n // 4}\n{n}\n")
+        for i in range(n):
+            check_in = rng.randrange(days)
+            check_out = check_in + rng.randint(1, 30)
+            file.write(f'{{"name": "{i}", "check-in": "{iso[check_in]}", '
+                       f'"check-out": "{iso[check_out]}"}}\n')
+
+
+def peak_rss_kb() -> int:
+    """
+    Возвращает пиковый размер резидентной памяти текущего процесса в КБ.
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage // 1024 if sys.platform == "darwin" else usage
+
+
+def measure_phases(path: str) -> dict[str, float]:
+    """
+    Замеряет по отдельности фазы конвейера run.py: разбор JSON, разбор дат
+    в разностный массив (accumulate_day_deltas), заселённость по дням и
+    OccupancyIndex.from_occupancy, запрос пика и проход sweep_day_deltas.
+    """
+    parse_date_ordinal.cache_clear()
+    start = time.perf_counter()
+    with open(path) as file:
+        max_capacity = int(file.readline())
+        n = int(file.readline())
+        guests = list(read_guests(file, n))
+    read = time.perf_counter()
+    day_deltas = accumulate_day_deltas(guests)
+    accumulated = time.perf_counter()
+    index = (OccupancyIndex.from_occupancy(*day_occupancy(day_deltas))
+             if day_deltas else OccupancyIndex())
+    built = time.perf_counter()
+    fits = not day_deltas or index.peak() <= max_capacity
+    queried = time.perf_counter()
+    swept_fits = sweep_day_deltas(max_capacity, day_deltas)
+    swept = time.perf_counter()
+    return {
+        "read_s": read - start,
+        "deltas_s": accumulated - read,
+        "index_s": built - accumulated,
+        "peak_s": queried - built,
+        "sweep_s": swept - queried,
+        "total_s": swept - start,
+        "result": fits and swept_fits,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def measure_reference_sort(path: str) -> dict[str, float]:
+    """
+    Справочный замер исходного алгоритма с сортировкой событий, которого в run.py
+    больше нет: разбор, сортировка и проход по событиям. Показывает, с чем
+    сравнивать фазы из measure_phases, но регрессии run.py в нём не видны.
+    """
+    parse_date_ordinal.cache_clear()
+    start = time.perf_counter()
+    with open(path) as file:
+        max_capacity = int(file.readline())
+        n = int(file.readline())
+        events = []
+        for guest in read_guests(file, n):
+            events.append((parse_date_ordinal(guest["check-in"]), 1))
+            events.append((parse_date_ordinal(guest["check-out"]), -1))
+    parsed = time.perf_counter()
+    events.sort()
+    sorted_at = time.perf_counter()
+    current = 0
+    fits = True
+    for _, delta in events:
+        current += delta
+        if current > max_capacity:
+            fits = False
+            break
+    swept = time.perf_counter()
+    return {
+        "parse_s": parsed - start,
+        "sort_s": sorted_at - parsed,
+        "sweep_s": swept - sorted_at,
+        "total_s": swept - start,
+        "result": fits,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def run_check_capacity(path: str) -> bool:
+    with open(path) as file:
+        max_capacity = int(file.readline())
+        n = int(file.readline())
+        return check_capacity(max_capacity, list(read_guests(file, n)))
+
+
+def run_check_capacity_stream(path: str) -> bool:
+    with open(path) as file:
+        max_capacity = int(file.readline())
+        n = int(file.readline())
+        return check_capacity_stream(max_capacity, read_guests(file, n))
+
+
+def run_check_capacity_ordinals(path: str) -> bool:
+    with open(path) as file:
+        max_capacity = int(file.readline())
+        n = int(file.readline())
+        check_ins, check_outs = [], []
+        for guest in read_guests(file, n):
+            check_ins.append(parse_date_ordinal(guest["check-in"]))
+            check_outs.append(parse_date_ordinal(guest["check-out"]))
+        return check_capacity_ordinals(max_capacity, check_ins, check_outs)
+
+
+IMPLEMENTATIONS: dict[str, Callable[[str], bool]] = {
+    "check_capacity": run_check_capacity,
+    "check_capacity_stream": run_check_capacity_stream,
+    "check_capacity_ordinals": run_check_capacity_ordinals,
+}
+
+
+def measure_implementation(name: str, path: str) -> dict[str, float]:
+    """
+    Замеряет полное время работы реализации от чтения файла до ответа.
+    """
+    start = time.perf_counter()
+    result = IMPLEMENTATIONS[name](path)
+    return {
+        "total_s": time.perf_counter() - start,
+        "result": result,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def in_fresh_process(function: Callable, *args) -> dict[str, float]:
+    """
+    Выполняет замер в отдельном процессе, чтобы пиковая память не копилась между замерами.
+    """
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(function, *args).result()
+
+
+def run_benchmarks(sizes: list[int], days: int) -> dict:
+    """
+    Прогоняет замеры для каждого размера входа и возвращает отчёт в виде словаря.
+    """
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "days": days,
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for n in sizes:
+            path = os.path.join(directory, f"feed_{n}.txt")
+            write_feed(path, n, days)
+            entry = {"n": n, "phases": in_fresh_process(measure_phases, path),
+                     "reference_sort": in_fresh_process(
+                         measure_reference_sort, path),
+                     "implementations": {}}
+            for name in IMPLEMENTATIONS:
+                entry["implementations"][name] = in_fresh_process(
+                    measure_implementation, name, path)
+            os.remove(path)
+            report["results"].append(entry)
+
+            phases = entry["phases"]
+            print(f"n={n}: read {phases['read_s']:.3f} с, "
+                  f"deltas {phases['deltas_s']:.3f} с, "
+                  f"index {phases['index_s']:.3f} с, "
+                  f"peak {phases['peak_s']:.3f} с, "
+                  f"sweep {phases['sweep_s']:.3f} с, "
+                  f"RSS {phases['peak_rss_kb']} КБ")
+            reference = entry["reference_sort"]
+            print(f"    справочно, сортировка событий: "
+                  f"{reference['total_s']:.3f} с")
+            for name, timing in entry["implementations"].items():
+                print(f"    {name}: {timing['total_s']:.3f} с, "
+                      f"RSS {timing['peak_rss_kb']} КБ")
+    return report
+
+
+def flatten_metrics(report: dict) -> dict[tuple[int, str], float]:
+    """
+    Собирает из отчёта все числовые метрики с ключами (n, имя метрики).
+    """
+    metrics: dict[tuple[int, str], float] = {}
+    for entry in report["results"]:
+        n = entry["n"]
+        for section in ("phases", "reference_sort"):
+            for key, value in entry.get(section, {}).items():
+                if key != "result":
+                    metrics[(n, f"{section}.{key}")] = value
+        for name, timing in entry["implementations"].items():
+            for key, value in timing.items():
+                if key != "result":
+                    metrics[(n, f"{name}.{key}")] = value
+    return metrics
+
+
+def compare_reports(baseline: dict, current: dict, threshold: float) -> int:
+    """
+    Сравнивает два отчёта и печатает изменения метрик.
+    Возвращает число метрик, ухудшившихся больше чем на threshold (доля).
+    """
+    before, after = flatten_metrics(baseline), flatten_metrics(current)
+    regressions = 0
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        change = (new - old) / old if old else 0.0
+        marker = ""
+        if change > threshold:
+            regressions += 1
+            marker = "  <-- регрессия"
+        n, metric = key
+        print(f"n={n:>9} {metric:<40} {old:>12.4f} -> {new:>12.4f} "
+              f"({change:+.1%}){marker}")
+    print(f"Регрессий: {regressions}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Бенчмарк проверки вместимости из run.py.")
+    parser.add_argument("--sizes", type=lambda text: [
+        int(float(size)) for size in text.split(",")], default=DEFAULT_SIZES,
+                        help="размеры входа через запятую, например 1e3,1e5")
+    parser.add_argument("--days", type=int, default=365,
+                        help="число дней, по которым распределены заезды")
+    parser.add_argument("--output", default="bench_output.json",
+                        help="файл для отчёта в формате JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="сравнить два отчёта вместо запуска замеров")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="допустимое ухудшение метрики (доля) при сравнении")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as baseline_file, \
+                open(args.compare[1]) as current_file:
+            found = compare_reports(json.load(baseline_file),
+                                    json.load(current_file), args.threshold)
+        sys.exit(1 if found else 0)
+
+    benchmark_report = run_benchmarks(args.sizes, args.days)
+    with open(args.output, "w") as output:
+        json.dump(benchmark_report, output, indent=2)
+    print(f"Отчёт сохранён в {args.output}")
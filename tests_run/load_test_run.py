@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from run import SERVER_HOST, SERVER_PORT
+
+
+async def open_connection(host: str, port: int, unix_path: str | None
+                          ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """
+    Подключается к серверу run.py по TCP или через Unix-сокет.
+    """
+    if unix_path is not None:
+        return await asyncio.open_unix_connection(unix_path)
+    return await asyncio.open_connection(host, port)
+
+
+def random_guest(i: int, days: int = 365) -> dict[str, str]:
+    """
+    Генерирует случайного гостя с датами в пределах days дней от начала 2021 года.
+    """
+    base = datetime(2021, 1, 1).date()
+    check_in = base + timedelta(days=random.randint(0, days - 1))
+    check_out = check_in + timedelta(days=random.randint(1, 14))
+    return {"name": str(i), "check-in": check_in.isoformat(),
+            "check-out": check_out.isoformat()}
+
+
+async def run_client(client_id: int, requests: int, hotels: int,
+                     latencies: list[float], host: str, port: int,
+                     unix_path: str | None) -> None:
+    """
+    Отправляет серию запросов (добавление гостя или проверка вместимости)
+    и записывает задержку каждого ответа в latencies.
+    """
+    reader, writer = await open_connection(host, port, unix_path)
+    for i in range(requests):
+        hotel = f"hotel-{random.randrange(hotels)}"
+        if random.random() < 0.5:
+            request = {"op": "add", "hotel": hotel,
+                       "guests": [random_guest(client_id * requests + i)]}
+        else:
+            request = {"op": "check", "hotel": hotel,
+                       "max_capacity": random.randint(0, 100)}
+        start = time.perf_counter()
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - start)
+        if not response["ok"]:
+            raise RuntimeError(f"Ошибка сервера: {response['error']}")
+    writer.close()
+    await writer.wait_closed()
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """
+    Возвращает перцентиль по отсортированному списку (ближайший ранг).
+    """
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def load_test(clients: int = 50, requests: int = 200, hotels: int = 10,
+                    host: str = SERVER_HOST, port: int = SERVER_PORT,
+                    unix_path: str | None = None) -> None:
+    """
+    Запускает clients одновременных клиентов и выводит p50/p99 задержки и число запросов в секунду.
+    """
+    latencies: list[float] = []
+    print(f"Запуск {clients} клиентов по {requests} запросов")
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(i, requests, hotels, latencies, host, port, unix_path)
+        for i in range(clients)))
+    duration = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"Запросов: {len(latencies)} за {duration:.2f} с "
+          f"({len(latencies) / duration:.0f} запросов/с)")
+    print(f"p50: {percentile(latencies, 0.50) * 1000:.3f} мс, "
+          f"p99: {percentile(latencies, 0.99) * 1000:.3f} мс")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Нагрузочный клиент для сервера run.py --serve.")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--hotels", type=int, default=10)
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--unix", metavar="SOCKET")
+    args = parser.parse_args()
+    asyncio.run(load_test(args.clients, args.requests, args.hotels,
+                          args.host, args.port, args.unix))
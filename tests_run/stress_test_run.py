@@ -1,6 +1,7 @@
 import random
 from datetime import datetime, timedelta
-from run import check_capacity, parse_date
+from run import (check_capacity, check_capacity_sorted, check_capacity_stream,
+                 parse_date_ordinal)
 
 
 def naive_check_capacity(max_capacity: int,
@@ -11,8 +12,8 @@ def naive_check_capacity(max_capacity: int,
     """
     intervals: list[any] = []
     for guest in guests:
-        check_in = parse_date(guest["check-in"])
-        check_out = parse_date(guest["check-out"])
+        check_in = parse_date_ordinal(guest["check-in"])
+        check_out = parse_date_ordinal(guest["check-out"])
         intervals.append((check_in, check_out))
     for check_in, _ in intervals:
         count = 0
@@ -56,13 +57,18 @@ def stress_test(number_tests: int = 1000, max_n: int = 100) -> None:
         guests = generate_guests(n)
 
         res_fast = check_capacity(cap, guests)
+        res_stream = check_capacity_stream(cap, iter(guests))
+        res_sorted = check_capacity_sorted(
+            cap, sorted(guests, key=lambda guest: guest["check-in"]))
         res_naive = naive_check_capacity(cap, guests)
 
-        if res_fast != res_naive:
+        if not res_fast == res_stream == res_sorted == res_naive:
             mismatches += 1
             print(f"Несоответствие в тесте {i}: n={n}, cap={cap}")
             print("guests =", guests)
             print("Текущий ответ:", res_fast)
+            print("Потоковый ответ:", res_stream)
+            print("Ответ по упорядоченному потоку:", res_sorted)
             print("Предполагаемый ответ:", res_naive)
             print()
 
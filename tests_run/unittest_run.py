@@ -1,69 +1,83 @@
+import json
+import os
+import io
+import random
+import tempfile
 import unittest
-from run import check_capacity
+from array import array
+from datetime import date, timedelta
+from unittest import mock
+from run import (OccupancyIndex, OccupancyRangeTable, accumulate_day_deltas,
+                 check_capacity, check_capacity_ordinals,
+                 check_capacity_parallel, check_capacity_sorted,
+                 check_capacity_stream, convert_to_binary, day_occupancy,
+                 handle_request, load_binary_guests, occupancy_profile,
+                 parse_date_ordinal)
 
 
 class TestCheckCapacity(unittest.TestCase):
+    cases: list[tuple[str, int, list[dict[str, str]], bool]] = [
+        ("no_guests", 10, [], True),
+        ("single_guest_fits", 1, [
+            {"name": "A", "check-in": "2021-01-01",
+             "check-out": "2021-01-02"}
+        ], True),
+        ("single_guest_too_many", 0, [
+            {"name": "A", "check-in": "2021-01-01",
+             "check-out": "2021-01-02"}
+        ], False),
+        ("non_overlapping_guests", 1, [
+            {"name": "A", "check-in": "2021-01-01",
+             "check-out": "2021-01-03"},
+            {"name": "B", "check-in": "2021-01-03",
+             "check-out": "2021-01-05"}
+        ], True),
+        ("overlapping_guests_fits", 3, [
+            {"name": "A", "check-in": "2021-01-01",
+             "check-out": "2021-01-04"},
+            {"name": "B", "check-in": "2021-01-02",
+             "check-out": "2021-01-05"},
+            {"name": "C", "check-in": "2021-01-03",
+             "check-out": "2021-01-06"}
+        ], True),
+        ("overlapping_guests_too_many", 2, [
+            {"name": "A", "check-in": "2021-01-01",
+             "check-out": "2021-01-04"},
+            {"name": "B", "check-in": "2021-01-02",
+             "check-out": "2021-01-05"},
+            {"name": "C", "check-in": "2021-01-03",
+             "check-out": "2021-01-06"}
+        ], False),
+        ("unordered_input_fits", 2, [
+            {"name": "B", "check-in": "2021-01-05",
+             "check-out": "2021-01-10"},
+            {"name": "A", "check-in": "2021-01-01",
+             "check-out": "2021-01-03"},
+            {"name": "C", "check-in": "2021-01-02",
+             "check-out": "2021-01-06"}
+        ], True),
+        ("unordered_input_too_many", 1, [
+            {"name": "B", "check-in": "2021-01-05",
+             "check-out": "2021-01-10"},
+            {"name": "A", "check-in": "2021-01-01",
+             "check-out": "2021-01-03"},
+            {"name": "C", "check-in": "2021-01-02",
+             "check-out": "2021-01-06"}
+        ], False),
+        ("edge_case_same_day_checkout_checkin", 1, [
+            {"name": "A", "check-in": "2021-01-01",
+             "check-out": "2021-01-02"},
+            {"name": "B", "check-in": "2021-01-02",
+             "check-out": "2021-01-03"}
+        ], True)
+    ]
+
     def test_check_capacity_cases(self) -> None:
         """
         Проверяет корректность работы функции check_capacity для разных сценариев:
         """
-        cases: list[tuple[str, int, list[dict[str, str]], bool]] = [
-            ("no_guests", 10, [], True),
-            ("single_guest_fits", 1, [
-                {"name": "A", "check-in": "2021-01-01",
-                 "check-out": "2021-01-02"}
-            ], True),
-            ("single_guest_too_many", 0, [
-                {"name": "A", "check-in": "2021-01-01",
-                 "check-out": "2021-01-02"}
-            ], False),
-            ("non_overlapping_guests", 1, [
-                {"name": "A", "check-in": "2021-01-01",
-                 "check-out": "2021-01-03"},
-                {"name": "B", "check-in": "2021-01-03",
-                 "check-out": "2021-01-05"}
-            ], True),
-            ("overlapping_guests_fits", 3, [
-                {"name": "A", "check-in": "2021-01-01",
-                 "check-out": "2021-01-04"},
-                {"name": "B", "check-in": "2021-01-02",
-                 "check-out": "2021-01-05"},
-                {"name": "C", "check-in": "2021-01-03",
-                 "check-out": "2021-01-06"}
-            ], True),
-            ("overlapping_guests_too_many", 2, [
-                {"name": "A", "check-in": "2021-01-01",
-                 "check-out": "2021-01-04"},
-                {"name": "B", "check-in": "2021-01-02",
-                 "check-out": "2021-01-05"},
-                {"name": "C", "check-in": "2021-01-03",
-                 "check-out": "2021-01-06"}
-            ], False),
-            ("unordered_input_fits", 2, [
-                {"name": "B", "check-in": "2021-01-05",
-                 "check-out": "2021-01-10"},
-                {"name": "A", "check-in": "2021-01-01",
-                 "check-out": "2021-01-03"},
-                {"name": "C", "check-in": "2021-01-02",
-                 "check-out": "2021-01-06"}
-            ], True),
-            ("unordered_input_too_many", 1, [
-                {"name": "B", "check-in": "2021-01-05",
-                 "check-out": "2021-01-10"},
-                {"name": "A", "check-in": "2021-01-01",
-                 "check-out": "2021-01-03"},
-                {"name": "C", "check-in": "2021-01-02",
-                 "check-out": "2021-01-06"}
-            ], False),
-            ("edge_case_same_day_checkout_checkin", 1, [
-                {"name": "A", "check-in": "2021-01-01",
-                 "check-out": "2021-01-02"},
-                {"name": "B", "check-in": "2021-01-02",
-                 "check-out": "2021-01-03"}
-            ], True)
-        ]
-
-        for name, max_capacity, guests, expected in cases:
+
+        for name, max_capacity, guests, expected in self.cases:
             with self.subTest(case=name):
                 result: bool = check_capacity(max_capacity, guests)
                 self.assertEqual(
@@ -72,6 +86,293 @@ class TestCheckCapacity(unittest.TestCase):
                     msg=f'Case "{name}": expected {expected}, got {result}'
                 )
 
+    def test_check_capacity_stream_cases(self) -> None:
+        """
+        Проверяет, что потоковый check_capacity_stream совпадает с check_capacity.
+        """
+        for name, max_capacity, guests, expected in self.cases:
+            with self.subTest(case=name):
+                result: bool = check_capacity_stream(max_capacity,
+                                                     iter(guests))
+                self.assertEqual(
+                    result,
+                    expected,
+                    msg=f'Case "{name}": expected {expected}, got {result}'
+                )
+
+    def test_check_capacity_sorted(self) -> None:
+        """
+        Проверяет режим упорядоченного потока: совпадение ответов, включая
+        откат при нарушенном порядке, и остановку чтения на первом превышении.
+        """
+        for name, max_capacity, guests, expected in self.cases:
+            with self.subTest(case=name):
+                self.assertEqual(
+                    check_capacity_sorted(max_capacity, iter(guests)),
+                    expected)
+
+        def feed():
+            for i in range(3):
+                yield {"name": str(i), "check-in": "2021-01-01",
+                       "check-out": "2021-01-05"}
+            raise AssertionError("Поток прочитан после превышения")
+
+        self.assertFalse(check_capacity_sorted(2, feed()))
+
+        # Выезд раньше заезда до превышения: проверка дочитывает поток целиком
+        guests = [{"name": "A", "check-in": "2021-01-01",
+                   "check-out": "2021-01-03"},
+                  {"name": "B", "check-in": "2021-01-02",
+                   "check-out": "2021-01-01"},
+                  {"name": "C", "check-in": "2021-01-03",
+                   "check-out": "2021-01-04"}]
+        self.assertTrue(check_capacity(1, guests))
+        self.assertTrue(check_capacity_sorted(1, iter(guests)))
+        # После превышения такой гость уже не читается: известное расхождение
+        guests = [{"name": "A", "check-in": "2021-01-01",
+                   "check-out": "2021-01-03"},
+                  {"name": "B", "check-in": "2021-01-01",
+                   "check-out": "2021-01-03"},
+                  {"name": "C", "check-in": "2021-01-03",
+                   "check-out": "2021-01-01"}]
+        self.assertTrue(check_capacity(1, guests))
+        self.assertFalse(check_capacity_sorted(1, iter(guests)))
+
+    def test_check_capacity_parallel_cases(self) -> None:
+        """
+        Проверяет параллельный разбор файла на тех же сценариях, что и check_capacity.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "guests.txt")
+            for name, max_capacity, guests, expected in self.cases:
+                with open(path, "w") as file:
+                    file.write(f"{max_capacity}\n{len(guests)}\n")
+                    file.writelines(json.dumps(guest) + "\n"
+                                    for guest in guests)
+                with self.subTest(case=name):
+                    self.assertEqual(check_capacity_parallel(path, workers=2),
+                                     expected)
+
+    def test_binary_guests_round_trip(self) -> None:
+        """
+        Проверяет конвертацию в бинарный формат и проверку по отображённым в память столбцам.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "guests.bin")
+            for name, max_capacity, guests, expected in self.cases:
+                text = f"{max_capacity}\n{len(guests)}\n" + "".join(
+                    json.dumps(guest) + "\n" for guest in guests)
+                convert_to_binary(io.StringIO(text), path)
+                loaded = load_binary_guests(path)
+                with self.subTest(case=name):
+                    self.assertEqual(loaded.max_capacity, max_capacity)
+                    self.assertEqual(
+                        list(loaded.check_ins),
+                        [parse_date_ordinal(g["check-in"]) for g in guests])
+                    self.assertEqual(
+                        check_capacity_ordinals(loaded.max_capacity,
+                                                loaded.check_ins,
+                                                loaded.check_outs),
+                        expected)
+                del loaded
+
+    def test_binary_guests_big_endian_host(self) -> None:
+        """
+        Проверяет ветку загрузки для big-endian машины: столбцы читаются как int32
+        и переставляются побайтно (на little-endian машине это даёт перевёрнутые числа).
+        """
+        guests = self.cases[1][2] + self.cases[2][2]
+        text = f"1\n{len(guests)}\n" + "".join(
+            json.dumps(guest) + "\n" for guest in guests)
+        expected = array("i", [parse_date_ordinal(guest["check-out"])
+                               for guest in guests])
+        expected.byteswap()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "guests.bin")
+            convert_to_binary(io.StringIO(text), path)
+            with mock.patch("run.sys.byteorder", "big"):
+                loaded = load_binary_guests(path)
+            self.assertEqual(list(loaded.check_outs), list(expected))
+            del loaded
+
+    def test_server_requests(self) -> None:
+        """
+        Проверяет операции протокола сервера над состоянием нескольких отелей.
+        """
+        hotels: dict[str, OccupancyIndex] = {}
+        _, _, guests, _ = self.cases[4]
+        self.assertEqual(handle_request(
+            hotels, {"op": "add", "hotel": "A", "guests": guests}), 3)
+        self.assertTrue(handle_request(
+            hotels, {"op": "check", "hotel": "A", "max_capacity": 3}))
+        self.assertFalse(handle_request(
+            hotels, {"op": "check", "hotel": "A", "max_capacity": 2}))
+        self.assertTrue(handle_request(
+            hotels, {"op": "check", "hotel": "B", "max_capacity": 0}))
+        self.assertEqual(handle_request(
+            hotels, {"op": "peak", "hotel": "A", "check-in": "2021-01-04",
+                     "check-out": "2021-01-06"}), 2)
+        self.assertEqual(handle_request(
+            hotels, {"op": "remove", "hotel": "A", "guests": guests[:1]}), 2)
+        self.assertTrue(handle_request(
+            hotels, {"op": "fits", "hotel": "A", "guest": guests[0],
+                     "max_capacity": 3}))
+        self.assertTrue(handle_request(hotels, {"op": "drop", "hotel": "A"}))
+        with self.assertRaises(ValueError):
+            handle_request(hotels, {"op": "unknown", "hotel": "A"})
+
+        # Ошибочный гость в запросе add не должен менять состояние
+        malformed = guests[:2] + [{"name": "X", "check-in": "2021-13-01",
+                                   "check-out": "2021-01-02"}]
+        with self.assertRaises(ValueError):
+            handle_request(hotels, {"op": "add", "hotel": "C",
+                                    "guests": malformed})
+        self.assertNotIn("C", hotels)
+        handle_request(hotels, {"op": "add", "hotel": "D", "guests": guests})
+        with self.assertRaises(KeyError):
+            handle_request(hotels, {"op": "add", "hotel": "D",
+                                    "guests": guests[:1] + [{"name": "Y"}]})
+        self.assertEqual(len(hotels["D"]), 3)
+
+        # remove тоже либо отменяет все бронирования, либо ни одного
+        missing = {"name": "Z", "check-in": "2020-01-01",
+                   "check-out": "2020-01-02"}
+        for guests_to_remove in (guests[:1] + [missing], guests[:1] * 2):
+            with self.assertRaises(KeyError):
+                handle_request(hotels, {"op": "remove", "hotel": "D",
+                                        "guests": guests_to_remove})
+        self.assertEqual(len(hotels["D"]), 3)
+        self.assertFalse(handle_request(
+            hotels, {"op": "check", "hotel": "D", "max_capacity": 2}))
+
+    def test_occupancy_profile(self) -> None:
+        """
+        Проверяет, что один профиль отвечает на любые пороги так же, как check_capacity.
+        """
+        for name, _, guests, _ in self.cases:
+            profile = occupancy_profile(guests)
+            for max_capacity in range(-1, 5):
+                with self.subTest(case=name, max_capacity=max_capacity):
+                    self.assertEqual(profile.fits(max_capacity),
+                                     check_capacity(max_capacity, guests))
+
+        _, _, guests, _ = self.cases[4]
+        profile = occupancy_profile(guests)
+        self.assertEqual(profile.peak, 3)
+        self.assertEqual(profile.peak_dates, [date(2021, 1, 3)])
+        self.assertEqual(profile.timeline, [
+            (date(2021, 1, 1), 1), (date(2021, 1, 2), 2),
+            (date(2021, 1, 3), 3), (date(2021, 1, 4), 2),
+            (date(2021, 1, 5), 1), (date(2021, 1, 6), 0),
+        ])
+
+    def test_occupancy_range_table(self) -> None:
+        """
+        Сверяет максимум по окнам дат из разреженной таблицы с OccupancyIndex.
+        """
+        random.seed(2)
+        base = date(2021, 1, 1)
+        guests: list[dict[str, str]] = []
+        for i in range(200):
+            check_in = base + timedelta(days=random.randint(0, 120))
+            check_out = check_in + timedelta(days=random.randint(1, 20))
+            guests.append({"name": str(i), "check-in": check_in.isoformat(),
+                           "check-out": check_out.isoformat()})
+        table = OccupancyRangeTable.from_guests(guests)
+        index = OccupancyIndex.from_guests(guests)
+        for _ in range(500):
+            start = base + timedelta(days=random.randint(-20, 160))
+            end = start + timedelta(days=random.randint(1, 60))
+            with self.subTest(start=start, end=end):
+                self.assertEqual(
+                    table.max_occupancy(start.isoformat(), end.isoformat()),
+                    index.peak(start.isoformat(), end.isoformat()))
+        self.assertEqual(
+            OccupancyRangeTable.from_guests([]).max_occupancy(
+                "2021-01-01", "2021-02-01"), 0)
+
+    def test_parse_date_ordinal(self) -> None:
+        """
+        Проверяет быстрый парсер дат: корректные даты и отказ на некорректных.
+        """
+        self.assertEqual(parse_date_ordinal("2021-01-02"),
+                         date(2021, 1, 2).toordinal())
+        self.assertEqual(parse_date_ordinal("2024-02-29"),
+                         date(2024, 2, 29).toordinal())
+        for bad in ("2021-1-02", "2021/01/02", "2021-02-30", "2021-13-01",
+                    "20210102", "2021-01-0x", "２021-01-02", ""):
+            with self.subTest(date_str=bad):
+                with self.assertRaises(ValueError):
+                    parse_date_ordinal(bad)
+
+    def test_occupancy_index_incremental(self) -> None:
+        """
+        Сверяет OccupancyIndex после случайных добавлений и отмен с прямым подсчётом по дням.
+        """
+        random.seed(1)
+        base = date(2021, 1, 1)
+        index = OccupancyIndex()
+        booked: list[dict[str, str]] = []
+        for step in range(300):
+            if booked and random.random() < 0.3:
+                guest = booked.pop(random.randrange(len(booked)))
+                index.remove_guest(guest)
+            else:
+                check_in = base + timedelta(days=random.randint(-60, 60))
+                check_out = check_in + timedelta(days=random.randint(1, 30))
+                guest = {"name": str(step), "check-in": check_in.isoformat(),
+                         "check-out": check_out.isoformat()}
+                booked.append(guest)
+                index.add_guest(guest)
+
+            start = base + timedelta(days=random.randint(-80, 80))
+            end = start + timedelta(days=random.randint(1, 40))
+            expected = max(
+                sum(1 for g in booked
+                    if g["check-in"] <= day.isoformat() < g["check-out"])
+                for day in (start + timedelta(days=i)
+                            for i in range((end - start).days)))
+            self.assertEqual(index.peak(start.isoformat(), end.isoformat()),
+                             expected)
+            probe = {"name": "probe", "check-in": start.isoformat(),
+                     "check-out": end.isoformat()}
+            self.assertEqual(index.fits(probe, expected + 1), True)
+            self.assertEqual(index.fits(probe, expected), False)
+
+        with self.assertRaises(KeyError):
+            index.remove_guest({"name": "X", "check-in": "1999-01-01",
+                                "check-out": "1999-01-02"})
+
+    def test_occupancy_index_from_occupancy(self) -> None:
+        """
+        Проверяет, что индекс по готовой заселённости дней совпадает с from_guests.
+        """
+        for name, _, guests, _ in self.cases:
+            if not guests:
+                continue
+            day_deltas = accumulate_day_deltas(guests)
+            index = OccupancyIndex.from_occupancy(*day_occupancy(day_deltas))
+            with self.subTest(case=name):
+                self.assertEqual(index.peak(),
+                                 OccupancyIndex.from_guests(guests).peak())
+
+    def test_occupancy_index_grows_left(self) -> None:
+        """
+        Проверяет, что бронирования в порядке убывания дат не удваивают дерево
+        на каждом шаге: размер индекса остаётся O(охвата дней).
+        """
+        base = date(2021, 1, 1)
+        index = OccupancyIndex()
+        nights = 20
+        for day in range(nights, 0, -1):
+            check_in = base + timedelta(days=day)
+            index.add_guest({"name": str(day), "check-in": check_in.isoformat(),
+                             "check-out": (check_in + timedelta(days=1)
+                                           ).isoformat()})
+        self.assertLessEqual(index._size, 4 * (nights + 1))
+        self.assertEqual(index.peak(), 1)
+        self.assertEqual(len(index), nights)
+
 
 if __name__ == "__main__":
     unittest.main()
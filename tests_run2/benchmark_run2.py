@@ -0,0 +1,112 @@
+import argparse
+import random
+import time
+
+from run2 import (a_star_search, build_reachability_graph, flatten_grid,
+                  index_points, parse_flat_grid, prune_grid)
+
+
+def large_maze(n: int, wall_prob: float, seed: int) -> list[list[str]]:
+    """
+    Лабиринт в стиле test_large_maze: роботы в углах, ряд из 26 ключей над
+    рядом дверей посередине, случайные стены с вероятностью wall_prob.
+    """
+    rng = random.Random(seed)
+    grid = [['#'] * n for _ in range(n)]
+    for i in range(1, n - 1):
+        for j in range(1, n - 1):
+            grid[i][j] = '#' if rng.random() < wall_prob else '.'
+    for row, col in ((1, 1), (1, n - 2), (n - 2, 1), (n - 2, n - 2)):
+        grid[row][col] = '@'
+    row_keys, row_doors = n // 2 - 2, n // 2 + 1
+    step = max(1, (n - 4) // 26)
+    for idx in range(26):
+        col = 2 + idx * step
+        grid[row_keys][col] = chr(ord('a') + idx)
+        grid[row_doors][col] = chr(ord('A') + idx)
+        grid[row_keys - 1][col] = grid[row_doors + 1][col] = '.'
+    return grid
+
+
+def scattered_maze(n: int, wall_prob: float, keys: int,
+                   seed: int) -> list[list[str]]:
+    """
+    Лабиринт с ключами и дверями, разбросанными по случайным свободным клеткам:
+    порядок сбора неочевиден, и поиск раскрывает заметно больше состояний.
+    """
+    rng = random.Random(seed)
+    grid = [['#'] * n for _ in range(n)]
+    for i in range(1, n - 1):
+        for j in range(1, n - 1):
+            grid[i][j] = '#' if rng.random() < wall_prob else '.'
+    free = [(i, j) for i in range(n) for j in range(n) if grid[i][j] == '.']
+    rng.shuffle(free)
+    for row, col in free[:4]:
+        grid[row][col] = '@'
+    for idx in range(keys):
+        row, col = free[4 + idx]
+        grid[row][col] = chr(ord('a') + idx)
+        row, col = free[4 + keys + idx]
+        grid[row][col] = chr(ord('A') + idx)
+    return grid
+
+
+def benchmark_frontiers(grid: list[list[str]], repeats: int
+                        ) -> dict[str, tuple[int, float]]:
+    """
+    Строит граф один раз и замеряет A* с каждой очередью (лучшее из repeats запусков).
+    """
+    flat = prune_grid(flatten_grid(grid)).grid
+    parsed = parse_flat_grid(flat)
+    points, coordinate_to_index = index_points(parsed.start_positions,
+                                               parsed.key_positions)
+    graph = build_reachability_graph(flat, points, coordinate_to_index)
+
+    timings = {}
+    for frontier in ("heap", "bucket"):
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = a_star_search(graph, len(parsed.key_positions), frontier)
+            best = min(best, time.perf_counter() - start)
+        timings[frontier] = (result, best)
+    return timings
+
+
+def run_benchmarks(sizes: list[int], seeds: int, repeats: int) -> None:
+    """
+    Сравнивает очереди A* на наборе лабиринтов и печатает таблицу времени.
+    """
+    cases = []
+    for n in sizes:
+        for seed in range(seeds):
+            cases.append((f"large n={n} seed={seed}",
+                          large_maze(n, 0.2, seed)))
+            cases.append((f"scattered n={n} seed={seed}",
+                          scattered_maze(n, 0.3, 12, seed)))
+
+    print(f"{'лабиринт':<28} {'ответ':>7} {'heap, с':>10} {'bucket, с':>10}")
+    total = {"heap": 0.0, "bucket": 0.0}
+    for name, grid in cases:
+        timings = benchmark_frontiers(grid, repeats)
+        (heap_result, heap_time), (bucket_result, bucket_time) = (
+            timings["heap"], timings["bucket"])
+        if heap_result != bucket_result:
+            print(f"Несоответствие на {name}: {heap_result} != {bucket_result}")
+        total["heap"] += heap_time
+        total["bucket"] += bucket_time
+        print(f"{name:<28} {heap_result:>7} {heap_time:>10.4f} "
+              f"{bucket_time:>10.4f}")
+    print(f"{'итого':<28} {'':>7} {total['heap']:>10.4f} "
+          f"{total['bucket']:>10.4f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Сравнение очередей A* (heapq и очередь Дайала) в run2.py.")
+    parser.add_argument("--sizes", type=lambda text: [
+        int(size) for size in text.split(",")], default=[50, 100])
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    run_benchmarks(args.sizes, args.seeds, args.repeats)
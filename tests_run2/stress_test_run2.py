@@ -58,7 +58,7 @@ def naive_solve(grid: list[list[str]]) -> int:
     best = float('inf')
 
     for order in itertools.permutations(keys):
-        for assign in itertools.product(range(4), repeat=K):
+        for assign in itertools.product(range(len(starts)), repeat=K):
             positions = list(starts)
             collected: set[str] = set()
             steps = 0
@@ -79,13 +79,14 @@ def naive_solve(grid: list[list[str]]) -> int:
 def generate_random_grid(n: int,
                          m: int,
                          max_keys: int = 3,
-                         wall_prob: float = 0.2
+                         wall_prob: float = 0.2,
+                         num_robots: int = 4
                          ) -> list[str]:
     """
     Генерирует случайный лабиринт в виде списка строк:
       - '.' — пустые клетки,
       - '#' — стены с вероятностью wall_prob,
-      - '@' — четыре стартовые позиции,
+      - '@' — num_robots стартовых позиций,
       - 'a'.. — ключи, 'A'.. — двери.
     """
     grid: list[list[str]] = [['.' for _ in range(m)] for _ in range(n)]
@@ -96,11 +97,11 @@ def generate_random_grid(n: int,
 
     empties = [(i, j) for i in range(n) for j in range(m) if grid[i][j] == '.']
     random.shuffle(empties)
-    for x, y in empties[:4]:
+    for x, y in empties[:num_robots]:
         grid[x][y] = '@'
 
     K = random.randint(1, max_keys)
-    remains = [pos for pos in empties if pos not in empties[:4]]
+    remains = [pos for pos in empties if pos not in empties[:num_robots]]
     random.shuffle(remains)
     key_positions = remains[:K]
     door_positions = remains[K:2 * K]
@@ -125,7 +126,8 @@ def run_stress_tests(number_tests: int = 50,
     print(f"Запуск {number_tests} случайных тестов")
     mismatches = 0
     for i in range(number_tests):
-        lines = generate_random_grid(n, m, max_keys)
+        lines = generate_random_grid(n, m, max_keys,
+                                     num_robots=random.randint(1, 4))
         grid = [list(line) for line in lines]
         res_fast = solve(grid)
         res_naive = naive_solve(grid)
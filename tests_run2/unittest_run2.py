@@ -1,6 +1,11 @@
+import os
+import tempfile
 import textwrap
 import unittest
-from run2 import solve
+from run2 import (GraphCache, MazeSolver, ParetoFrontier, SolveStats,
+                  apply_pareto_filter, build_reachability_graph,
+                  compile_transitions, decompose_graph, flatten_grid,
+                  index_points, parse_grid, prune_grid, read_flat_grid, solve)
 
 
 class TestMazeRobots(unittest.TestCase):
@@ -8,11 +13,15 @@ class TestMazeRobots(unittest.TestCase):
         """
         Преобразует текстовое представление лабиринта в сетку и вызывает solve.
         """
-        grid = [
-            list(line)
-            for line in textwrap.dedent(input_str).strip().splitlines()
-        ]
-        return solve(grid)
+        text = textwrap.dedent(input_str).strip()
+        grid = [list(line) for line in text.splitlines()]
+        result = solve(grid)
+        self.assertEqual(solve(read_flat_grid(text.encode())), result)
+        self.assertEqual(solve(grid, contract=True), result)
+        self.assertEqual(solve(grid, prune=False), result)
+        self.assertEqual(solve(grid, frontier="bucket"), result)
+        self.assertEqual(solve(grid, decompose=False), result)
+        return result
 
     def test_all_cases(self):
         """
@@ -230,7 +239,31 @@ class TestMazeRobots(unittest.TestCase):
             #.#.#.###.#.#.#####.#.#.###.#####.#.#.#.#.#.#.#.#.#.#.#.#.#####.#.###.#########.#
             #...#.....#.......#...#.........#.Y...#.#..s#...#..g..#.......#v..#............l#
             #################################################################################
-            """, 1640)
+            """, 1640),
+
+            ("one_robot", """
+             #########
+             #b.A.@.a#
+             #########
+             """, 8),
+
+            ("extended_alphabet", """
+             #########
+             #ж.Λ.@.λ#
+             ###Ж#####
+             ###z#####
+             #########
+             """, 12),
+
+            ("six_robots", """
+             #######
+             #@.a.@#
+             #######
+             #@b..c#
+             #######
+             #@.d@.#
+             #######
+             """, 7),
         ]
 
         for name, grid_str, expected in cases:
@@ -241,6 +274,229 @@ class TestMazeRobots(unittest.TestCase):
                     msg=f'{name}: expected {expected}, got {got}'
                 )
 
+    def test_build_reachability_graph(self) -> None:
+        """
+        Проверяет рёбра графа достижимости: маски дверей и расстояния между точками.
+        """
+        grid = [list("@.A.a"), list("#.###"), list("@.b..")]
+        parsed = parse_grid(grid)
+        points, coordinate_to_index = index_points(parsed.start_positions,
+                                                   parsed.key_positions)
+        graph = build_reachability_graph(grid, points, coordinate_to_index)
+        self.assertEqual([dict(adjacency) for adjacency in graph], [
+            {1: [(0, 4)], 2: [(1, 4)], 3: [(0, 4)]},
+            {0: [(0, 4)], 2: [(1, 6)], 3: [(0, 2)]},
+            {0: [(1, 4)], 1: [(1, 6)], 3: [(1, 6)]},
+            {0: [(0, 4)], 1: [(0, 2)], 2: [(1, 6)]},
+        ])
+
+    def test_build_reachability_graph_parallel(self) -> None:
+        """
+        Проверяет, что граф, построенный в пуле процессов, совпадает с последовательным.
+        """
+        grid = [list(row) for row in (
+            "#############",
+            "#@.a.#..B..c#",
+            "#.##.#.###.##",
+            "#..A...b..@.#",
+            "#############",
+        )]
+        parsed = parse_grid(grid)
+        points, coordinate_to_index = index_points(parsed.start_positions,
+                                                   parsed.key_positions)
+        sequential = build_reachability_graph(grid, points, coordinate_to_index)
+        parallel = build_reachability_graph(grid, points, coordinate_to_index,
+                                            workers=2)
+        self.assertEqual([dict(adjacency) for adjacency in parallel],
+                         [dict(adjacency) for adjacency in sequential])
+
+    def test_pareto_frontier(self) -> None:
+        """
+        Проверяет Парето-фронт: доминируемые пары не добавляются, а добавленная
+        пара вытесняет те, над которыми доминирует.
+        """
+        frontier = ParetoFrontier()
+        self.assertTrue(frontier.insert(0b011, 10))
+        self.assertTrue(frontier.insert(0b100, 12))
+        self.assertFalse(frontier.insert(0b111, 10))
+        self.assertFalse(frontier.insert(0b011, 11))
+        self.assertTrue(frontier.insert(0b001, 10))
+        self.assertEqual(sorted(frontier.items()), [(0b001, 10), (0b100, 12)])
+        self.assertTrue(frontier.insert(0b111, 3))
+        self.assertEqual(len(frontier), 3)
+        self.assertTrue(frontier.dominates(0b101, 10))
+        self.assertFalse(frontier.dominates(0b010, 100))
+
+        graph = [{1: [(0b01, 5), (0b11, 4), (0b01, 6), (0b10, 3), (0b11, 9)]}]
+        apply_pareto_filter(graph)
+        self.assertEqual(sorted(graph[0][1]), [(0b01, 5), (0b10, 3)])
+
+    def test_compile_transitions(self) -> None:
+        """
+        Проверяет таблицу переходов: варианты упорядочены по расстоянию,
+        маска достижимых ключей учитывает только ключи с путями.
+        """
+        graph = [{1: [(0, 3)], 2: [(0b10, 2), (0, 7)]},
+                 {0: [(0, 3)], 2: [(0, 5)]},
+                 {0: [(0, 2)], 1: [(0, 5)]}]
+        table = compile_transitions(graph, 1, 2)
+        self.assertEqual(table.variants, [
+            ((0, 3),), ((0b10, 2), (0, 7)),
+            (), ((0, 5),),
+            ((0, 5),), (),
+        ])
+        self.assertEqual(table.reachable_keys, [0b11, 0b10, 0b01])
+
+    def test_decompose_graph(self) -> None:
+        """
+        Проверяет разбиение на подзадачи: области с взаимной зависимостью по
+        дверям объединяются, независимая и зависящая без цикла решаются отдельно.
+        """
+        grid = [list(row) for row in (
+            "#########",
+            "#@.a.B.c#",
+            "#########",
+            "#@.b.A.d#",
+            "#########",
+            "#@.e....#",
+            "#########",
+            "#@.E.g..#",
+            "#########",
+        )]
+        parsed = parse_grid(grid)
+        points, coordinate_to_index = index_points(parsed.start_positions,
+                                                   parsed.key_positions)
+        graph = build_reachability_graph(grid, points, coordinate_to_index)
+        self.assertEqual(
+            [tuple(subproblem) for subproblem in decompose_graph(graph, 6)],
+            [([0, 1], [0, 1, 2, 3]), ([2], [4]), ([3], [5])])
+        self.assertEqual(solve(grid), 18)
+
+    def test_prune_grid(self) -> None:
+        """
+        Проверяет упрощение лабиринта: дверь без ключа становится стеной, тупики
+        заливаются, дверь за своим ключом снимается.
+        """
+        grid = [list(row) for row in (
+            "#########",
+            "#@.a.A.b#",
+            "#.###C###",
+            "#...#.#.#",
+            "#########",
+        )]
+        report = prune_grid(flatten_grid(grid))
+        self.assertEqual(report.removed_cells, 7)
+        self.assertEqual(report.dropped_doors, 1)
+        stride = report.grid.stride
+        rows = [report.grid.cells[row * stride:row * stride + stride - 1]
+                .decode() for row in range(1, len(grid) + 1)]
+        self.assertEqual(rows, [
+            "#########",
+            "#@.a...b#",
+            "#########",
+            "#########",
+            "#########",
+        ])
+
+    def test_graph_cache(self) -> None:
+        """
+        Проверяет дисковый кэш: повторное решение берёт ответ из кэша,
+        запись без ответа даёт тот же результат, старые записи вытесняются.
+        """
+        mazes = [[list(row) for row in rows] for rows in (
+            ("#######", "#a.#Cd#", "##@#@##", "#######",
+             "##@#@##", "#cB#Ab#", "#######"),
+            ("#######", "#@.a..#", "#.###.#", "#@.#.@#",
+             "#######", "#@..A.#", "#######"),
+        )]
+        expected = [solve(grid) for grid in mazes]
+        with tempfile.TemporaryDirectory() as directory:
+            cache = GraphCache(directory)
+            self.assertEqual(solve(mazes[0], cache=cache), expected[0])
+            key = cache.key(flatten_grid(mazes[0]), True)
+            self.assertEqual(cache.load(key).answer, expected[0])
+            self.assertEqual(solve(mazes[0], cache=cache), expected[0])
+
+            graph_only = GraphCache(directory, store_answers=False)
+            self.assertEqual(solve(mazes[1], cache=graph_only), expected[1])
+            second_key = graph_only.key(flatten_grid(mazes[1]), True)
+            self.assertIsNone(graph_only.load(second_key).answer)
+            self.assertEqual(solve(mazes[1], cache=graph_only), expected[1])
+
+            with open(os.path.join(directory, f"{key}.graph"), "r+b") as file:
+                file.truncate(10)
+            self.assertIsNone(cache.load(key))
+
+            cache.max_bytes = 0
+            self.assertEqual(cache.evict(), 1)
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_maze_solver_set_cell(self) -> None:
+        """
+        Проверяет инкрементальный решатель: после каждой правки ответ совпадает
+        с solve, а правка пересчитывает не все строки графа.
+        """
+        grid = [list(row) for row in (
+            "###############",
+            "#@.a.#.....#..#",
+            "#.##.#.###.#.##",
+            "#..B...#b..#..#",
+            "###.#######.###",
+            "#@....c..C...@#",
+            "#.###.#####.#.#",
+            "#@..#...A.....#",
+            "###############",
+        )]
+        solver = MazeSolver(grid)
+        self.assertEqual(solver.solve(), solve(grid))
+        edits = [(3, 4, '#'), (1, 11, '.'), (5, 9, '.'), (7, 8, '#'),
+                 (3, 9, 'B'), (1, 2, 'c'), (5, 6, '.')]
+        for row, col, char in edits:
+            grid[row][col] = char
+            solver.set_cell(row, col, char)
+            with self.subTest(edit=(row, col, char)):
+                self.assertEqual(solver.solve(), solve(grid))
+        self.assertLess(solver.set_cell(1, 13, '#'), len(solver.graph))
+        self.assertEqual(solver.set_cell(0, 0, '#'), 0)
+        with self.assertRaises(IndexError):
+            solver.set_cell(9, 0, '.')
+
+    def test_solve_stats(self) -> None:
+        """
+        Проверяет, что SolveStats заполняется и не меняет ответ.
+        """
+        grid = [list(row) for row in textwrap.dedent("""\
+            #############
+            #g#f.D#..h#l#
+            #F###e#E###.#
+            #dCba@#@BcIJ#
+            #############
+            #nK.L@#@G...#
+            #M###N#H###.#
+            #o#m..#i#jk.#
+            #############""").splitlines()]
+        stats = SolveStats()
+        self.assertEqual(solve(grid, stats=stats), solve(grid))
+        report = stats.to_dict()
+        self.assertEqual(set(report["phases"]),
+                         {"read", "prune", "parse", "index", "graph", "search"})
+        self.assertEqual(report["bfs_sources"], 4 + 15)
+        self.assertGreater(report["bfs_cells_max"], 0)
+        self.assertGreaterEqual(report["graph_variants"], report["graph_edges"])
+        self.assertGreater(report["graph_edges"], 0)
+        self.assertLessEqual(report["popped"], report["pushed"])
+        self.assertLessEqual(report["stale"], report["popped"])
+        self.assertGreater(report["peak_queue"], 0)
+        self.assertLessEqual(report["best_cost_size"], report["pushed"])
+
+        grid = [list("#########"), list("#@.a.B..#"), list("#########")]
+        stats = SolveStats()
+        self.assertEqual(solve(grid, stats=stats), 2)
+        pruned = prune_grid(flatten_grid(grid))
+        self.assertEqual((stats.removed_cells, stats.dropped_doors),
+                         (pruned.removed_cells, pruned.dropped_doors))
+        self.assertGreater(stats.removed_cells, 0)
+
 
 if __name__ == "__main__":
     unittest.main()